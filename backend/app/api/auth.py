@@ -1,7 +1,12 @@
 from fastapi import APIRouter, HTTPException, status, Depends
 from fastapi.responses import RedirectResponse
-from app.core.auth import create_access_token, verify_google_token, get_current_user
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from app.core.auth import (
+    create_access_token, create_session_tokens, verify_google_token, get_current_user,
+    access_token_payload, refresh_token_payload, spend_refresh_token, revocation_list
+)
 from app.services.user_service import user_service
+from app.models.token import TokenPair, RefreshRequest, LogoutRequest
 from app.models.user import UserCreate, User
 from app.core.config import settings
 import httpx
@@ -11,6 +16,7 @@ import logging
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
+bearer = HTTPBearer()
 
 
 @router.get("/google")
@@ -85,15 +91,20 @@ async def google_callback(code: str):
             )
             user = await user_service.create_user(user_data)
         
-        # Create access token
-        access_token = create_access_token(data={"sub": user.id})
-        
         # Redirect to frontend with token - use production URL for Vercel, localhost for development
         if os.getenv("VERCEL"):
             frontend_url = "https://hvr-frontend.vercel.app/auth/callback"
         else:
             frontend_url = "http://localhost:3000/auth/callback"
-        return RedirectResponse(url=f"{frontend_url}?token={access_token}")
+        
+        # Tokens go in the fragment so they stay out of browser history, server logs and Referer headers
+        if settings.jwt_self_contained:
+            tokens = create_session_tokens(user)
+            return RedirectResponse(url=f"{frontend_url}#token={tokens['access_token']}&refresh_token={tokens['refresh_token']}")
+        
+        # Create access token
+        access_token = create_access_token(data={"sub": user.id})
+        return RedirectResponse(url=f"{frontend_url}#token={access_token}")
         
     except Exception as e:
         raise HTTPException(
@@ -106,3 +117,52 @@ async def google_callback(code: str):
 async def get_current_user_info(current_user: User = Depends(get_current_user)):
     """Get current user information"""
     return current_user
+
+
+@router.post("/refresh", response_model=TokenPair)
+async def refresh_tokens(request: RefreshRequest):
+    """Exchange a refresh token for a new token pair; each refresh token works once"""
+    payload = refresh_token_payload(request.refresh_token)
+    if payload is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired refresh token"
+        )
+    
+    # Revoked before any await, so a concurrent refresh with the same token fails the check above
+    revocation_list.revoke(payload)
+    # Other processes and restarts only see the token as used through the database
+    if not await spend_refresh_token(payload):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired refresh token"
+        )
+    
+    # The one lookup per access token lifetime, picking up profile changes
+    user = await user_service.get_user_by_id(payload["sub"])
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found"
+        )
+    
+    return create_session_tokens(user)
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(request: LogoutRequest, credentials: HTTPAuthorizationCredentials = Depends(bearer)):
+    """Revoke the presented access token and, when given, its refresh token"""
+    payload = access_token_payload(credentials.credentials)
+    if payload is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    revocation_list.revoke(payload)
+    
+    if request.refresh_token:
+        refresh_payload = refresh_token_payload(request.refresh_token)
+        if refresh_payload and refresh_payload["sub"] == payload["sub"]:
+            revocation_list.revoke(refresh_payload)
+            await spend_refresh_token(refresh_payload)
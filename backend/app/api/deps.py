@@ -1,7 +1,6 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from app.core.auth import verify_token
-from app.services.user_service import user_service
+from app.core.auth import access_token_payload, user_from_payload
 from app.models.user import User
 
 security = HTTPBearer()
@@ -10,7 +9,7 @@ security = HTTPBearer()
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> User:
     """Get current authenticated user"""
     token = credentials.credentials
-    payload = verify_token(token)
+    payload = access_token_payload(token)
     
     if payload is None:
         raise HTTPException(
@@ -27,7 +26,7 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    user = await user_service.get_user_by_id(user_id)
+    user = await user_from_payload(payload)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -0,0 +1,89 @@
+from fastapi import APIRouter, HTTPException, status, Request, Query
+from fastapi.responses import Response
+from app.core.file_response import RangeFileResponse, RangeNotSatisfiable, parse_range, file_etag, etag_matches
+from app.services.direct_upload_service import direct_upload_service, DirectUploadError
+from app.services.storage_service import storage_service
+from app.core.config import settings
+import mimetypes
+import os
+
+router = APIRouter(tags=["files"])
+
+PUBLIC_PREFIXES = ("users", "blobs")
+
+
+@router.api_route("/uploads/{storage_path:path}", methods=["GET", "HEAD"])
+async def serve_local_file(storage_path: str, request: Request):
+    """Serve an object from local storage with HTTP Range support"""
+    try:
+        path = storage_service.backend.full_path(storage_path)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
+    
+    # Only stored audio is public: spooled upload jobs and in-flight temp files share the root
+    parts = os.path.relpath(path, storage_service.backend.root).split(os.sep)
+    if parts[0] not in PUBLIC_PREFIXES or parts[-1].startswith(".upload-"):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
+    
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
+    
+    size = os.path.getsize(path)
+    etag = file_etag(path)
+    headers = {"etag": etag, "cache-control": "max-age=3600"}
+    
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    try:
+        byte_range = parse_range(request.headers.get("range"), size)
+    except RangeNotSatisfiable:
+        return Response(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            headers={"content-range": f"bytes */{size}"}
+        )
+    
+    if byte_range is None:
+        return RangeFileResponse(path, 0, size - 1, headers=headers, media_type=media_type)
+    
+    start, end = byte_range
+    headers["content-range"] = f"bytes {start}-{end}/{size}"
+    return RangeFileResponse(
+        path, start, end,
+        status_code=status.HTTP_206_PARTIAL_CONTENT,
+        headers=headers,
+        media_type=media_type
+    )
+
+
+@router.put("/uploads/{storage_path:path}", status_code=status.HTTP_201_CREATED)
+async def put_local_file(storage_path: str, request: Request, token: str = Query(...)):
+    """Accept a direct upload to local storage; the local stand-in for a signed Storage URL"""
+    grant = direct_upload_service.verify_grant(token)
+    if not grant or grant["path"] != storage_path:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid or expired upload token")
+    
+    content_type = request.headers.get("content-type", "")
+    if not content_type.startswith("audio/"):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="File must be an audio file")
+    
+    received = 0
+    
+    async def limited():
+        nonlocal received
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > settings.direct_upload_max_bytes:
+                raise DirectUploadError(f"File exceeds the {settings.direct_upload_max_bytes} byte limit")
+            yield chunk
+    
+    try:
+        uploaded = await storage_service.upload_object_stream(storage_path, limited(), content_type)
+    except DirectUploadError as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    
+    if not uploaded:
+        # Grants name a fresh object; overwriting is never allowed
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="File already exists")
+    return {"key": storage_path, "size": received}
@@ -0,0 +1,22 @@
+from fastapi import APIRouter, HTTPException, status, Depends
+from app.models.upload_job import UploadJobStatus
+from app.models.user import User
+from app.services.upload_job_service import upload_job_service
+from app.api.deps import get_current_user
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+
+@router.get("/{job_id}", response_model=UploadJobStatus)
+async def get_job(
+    job_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Get the status of a background upload job"""
+    job = await upload_job_service.get_job(job_id, current_user.id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    return job
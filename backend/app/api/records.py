@@ -1,13 +1,24 @@
-from fastapi import APIRouter, HTTPException, status, Depends, UploadFile, File
-from typing import List
-from app.models.record import Record, RecordCreate, RecordUpdate
+from fastapi import APIRouter, HTTPException, status, Depends, UploadFile, File, Request, Query
+from fastapi.responses import Response, StreamingResponse
+from starlette.background import BackgroundTask
+from typing import Literal, Optional, Union
+from pydantic import ValidationError
+from app.models.record import Record, RecordPage, RecordSummaryPage, RecordSearchPage, RecordStats, RecordCreate, RecordUpdate, RecordBatchCreate, RecordBatchResult, RecordBatchResponse, RecordImportResponse, RecordBulkDelete, RecordBulkDeleteResponse
 from app.models.user import User
 from app.services.record_service import record_service
+from app.services.storage_service import storage_service, build_audio_filename
+from app.services.waveform_service import waveform_service
+from app.services.export_service import export_service
+from app.services.import_service import import_service, ImportFormatError, detect_format, format_validation_error
 from app.api.deps import get_current_user
 from app.core.config import settings
+from app.core.pagination import InvalidCursor
+from app.core.streaming import iter_upload_file, spool_to_file, remove_quietly
+from app.core.file_response import RangeFileResponse, etag_matches
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
 import aiofiles
-import os
-from datetime import datetime
+import hashlib
 
 router = APIRouter(prefix="/records", tags=["records"])
 
@@ -21,24 +32,208 @@ async def create_record(
     return await record_service.create_record(record_data, current_user.id)
 
 
-@router.get("/", response_model=List[Record])
-async def get_records(current_user: User = Depends(get_current_user)):
-    """Get all records for the current user"""
-    return await record_service.get_records_by_user(current_user.id)
+def _weak_etag(*parts) -> str:
+    """Weak validator: equal JSON bodies, not necessarily byte-identical ones"""
+    return 'W/"' + hashlib.sha256("|".join(str(part) for part in parts).encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def _not_modified(request: Request, etag: str, last_modified: Optional[datetime] = None) -> bool:
+    """Whether the client's cached copy is current; If-None-Match wins over If-Modified-Since"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag_matches(if_none_match, etag)
+    
+    if_modified_since = request.headers.get("if-modified-since")
+    if last_modified is None or not if_modified_since:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    # HTTP dates have whole-second precision
+    return last_modified.replace(microsecond=0) <= since
+
+
+def _record_validators(record_id: str, updated_at: datetime) -> dict:
+    return {
+        "etag": _weak_etag(record_id, updated_at.isoformat()),
+        "last-modified": format_datetime(updated_at.astimezone(timezone.utc), usegmt=True),
+        "cache-control": "private, no-cache",
+    }
+
+
+@router.get("/", response_model=Union[RecordPage, RecordSummaryPage])
+async def get_records(
+    request: Request,
+    response: Response,
+    limit: int = Query(default=50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    view: Literal["full", "summary"] = "full",
+    current_user: User = Depends(get_current_user)
+):
+    """Get a page of records for the current user, newest first.
+    
+    view=summary leaves out the script and description bodies in favour of a
+    short preview; fetch /records/{record_id} for the full record.
+    
+    Answers 304 to a matching If-None-Match after a single version query.
+    """
+    # Deletes do not move max(updated_at), so listings carry an ETag but no Last-Modified
+    latest, count = await record_service.get_records_version(current_user.id)
+    headers = {
+        "etag": _weak_etag(current_user.id, latest.isoformat() if latest else "", count, view, limit, cursor or ""),
+        "cache-control": "private, no-cache",
+    }
+    if _not_modified(request, headers["etag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    try:
+        if view == "summary":
+            page = await record_service.get_record_summaries_by_user(current_user.id, limit, cursor)
+        else:
+            page = await record_service.get_records_by_user(current_user.id, limit, cursor)
+    except InvalidCursor as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    response.headers.update(headers)
+    return page
+
+
+@router.post("/batch", response_model=RecordBatchResponse)
+async def create_records_batch(
+    batch: RecordBatchCreate,
+    current_user: User = Depends(get_current_user)
+):
+    """Create many records at once, reporting an ID or an error per item"""
+    if len(batch.records) > settings.bulk_max_items:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.bulk_max_items} records can be created per request"
+        )
+    
+    results = []
+    valid = []
+    for index, item in enumerate(batch.records):
+        try:
+            valid.append((index, RecordCreate.model_validate(item)))
+        except ValidationError as e:
+            results.append(RecordBatchResult(index=index, status="invalid", error=format_validation_error(e)))
+    
+    created = await record_service.create_records([record for _, record in valid], current_user.id)
+    for (index, _), record in zip(valid, created):
+        if record:
+            results.append(RecordBatchResult(index=index, status="created", id=record.id))
+        else:
+            results.append(RecordBatchResult(index=index, status="error", error="Failed to store record"))
+    
+    results.sort(key=lambda result: result.index)
+    return {
+        "created": sum(1 for result in results if result.status == "created"),
+        "results": results
+    }
+
+
+@router.post("/import", response_model=RecordImportResponse)
+async def import_records(
+    file: UploadFile = File(...),
+    format: Optional[Literal["csv", "jsonl"]] = Query(default=None),
+    current_user: User = Depends(get_current_user)
+):
+    """Create records from a CSV or JSONL file of title/script/description rows.
+    
+    Valid rows are created even when others fail; failed rows are reported
+    by their line in the file.
+    """
+    try:
+        file_format = format or detect_format(file.filename, file.content_type)
+    except ImportFormatError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    received = 0
+    
+    async def limited():
+        nonlocal received
+        async for chunk in iter_upload_file(file):
+            received += len(chunk)
+            if received > settings.import_max_bytes:
+                raise ImportFormatError(f"File exceeds the {settings.import_max_bytes} byte limit")
+            yield chunk
+    
+    path = None
+    try:
+        path = await spool_to_file(limited(), suffix=f".{file_format}")
+        return await import_service.import_file(path, file_format, current_user.id)
+    except ImportFormatError as e:
+        code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE if received > settings.import_max_bytes else status.HTTP_400_BAD_REQUEST
+        raise HTTPException(status_code=code, detail=str(e))
+    finally:
+        remove_quietly(path)
+
+
+@router.get("/stats", response_model=RecordStats)
+async def get_record_stats(current_user: User = Depends(get_current_user)):
+    """Totals across all of the current user's records, without listing them"""
+    return await record_service.get_record_stats(current_user.id)
+
+
+@router.get("/export")
+async def export_records(current_user: User = Depends(get_current_user)):
+    """Download every record as a ZIP: manifest.jsonl plus the audio files, streamed as it is built"""
+    filename = f"recordings-{datetime.now(timezone.utc).strftime('%Y%m%d-%H%M%S')}.zip"
+    return StreamingResponse(
+        export_service.export_archive(current_user.id),
+        media_type="application/zip",
+        headers={"content-disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+@router.get("/search", response_model=RecordSearchPage)
+async def search_records(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(default=20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    current_user: User = Depends(get_current_user)
+):
+    """Search the current user's records by title, description and script.
+    
+    q accepts web-search syntax: quoted phrases, OR, and -excluded words.
+    """
+    try:
+        return await record_service.search_records(current_user.id, q, limit, cursor)
+    except InvalidCursor as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
 
 
 @router.get("/{record_id}", response_model=Record)
 async def get_record(
     record_id: str,
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_user)
 ):
-    """Get a specific record"""
+    """Get a specific record, answering 304 when the client's copy is current"""
+    updated_at = await record_service.get_record_version(record_id, current_user.id)
+    if updated_at is not None:
+        headers = _record_validators(record_id, updated_at)
+        if _not_modified(request, headers["etag"], updated_at):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
     record = await record_service.get_record_by_id(record_id, current_user.id)
     if not record:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Record not found"
         )
+    # Validators describe the body actually sent, which may be newer than the version checked
+    response.headers.update(_record_validators(record.id, record.updated_at))
     return record
 
 
@@ -73,6 +268,25 @@ async def delete_record(
     return {"message": "Record deleted successfully"}
 
 
+@router.post("/bulk-delete", response_model=RecordBulkDeleteResponse)
+async def bulk_delete_records(
+    request_data: RecordBulkDelete,
+    current_user: User = Depends(get_current_user)
+):
+    """Delete many records at once, reporting the outcome per ID"""
+    if len(request_data.record_ids) > settings.bulk_max_items:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.bulk_max_items} records can be deleted per request"
+        )
+    
+    results = await record_service.delete_records(request_data.record_ids, current_user.id)
+    return {
+        "deleted": sum(1 for result in results if result.status == "deleted"),
+        "results": results
+    }
+
+
 @router.post("/{record_id}/upload-audio")
 async def upload_audio(
     record_id: str,
@@ -96,19 +310,14 @@ async def upload_audio(
         )
     
     try:
-        # Read file content directly (no local file saving)
-        content = await audio_file.read()
-        
         # Create filename
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        file_extension = os.path.splitext(audio_file.filename)[1]
-        filename = f"{record_id}_{timestamp}{file_extension}"
+        filename = build_audio_filename(record_id, audio_file.filename)
         
-        # Upload directly to Supabase Storage
-        updated_record = await record_service.upload_audio_to_storage(
+        # Stream to Supabase Storage in fixed-size chunks (constant memory per upload)
+        updated_record = await record_service.upload_audio_stream(
             record_id, 
             current_user.id, 
-            content,
+            iter_upload_file(audio_file),
             filename,
             audio_file.content_type
         )
@@ -152,3 +361,102 @@ async def get_audio_file(
         )
     
     return {"audio_url": record.audio_file_path}
+
+
+def _audio_etag(record: Record) -> str:
+    """Strong ETag for a record's audio; stored objects are never rewritten in place"""
+    if record.audio_digest:
+        return f'"{record.audio_digest}"'
+    return '"' + hashlib.sha256(record.audio_file_path.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+@router.api_route("/{record_id}/audio/stream", methods=["GET", "HEAD"])
+async def stream_audio_file(
+    record_id: str,
+    request: Request,
+    current_user: User = Depends(get_current_user)
+):
+    """Stream a record's audio through the API with Range and ETag support"""
+    record = await record_service.get_record_by_id(record_id, current_user.id)
+    if not record:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Record not found"
+        )
+    
+    # audio_file_path is client-writable, so only the record's own objects are served
+    storage_path = (
+        storage_service.record_object_path(record.audio_file_path, current_user.id, record.id, record.audio_digest)
+        if record.audio_file_path else None
+    )
+    if not storage_path:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No audio file found for this record"
+        )
+    
+    etag = _audio_etag(record)
+    # Revalidate every time: the record may point at a new upload, but unchanged audio is a cheap 304
+    headers = {"etag": etag, "cache-control": "private, no-cache", "accept-ranges": "bytes"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and if_range and if_range.strip() != etag:
+        # The client's partial copy is stale, so send the whole file
+        range_header = None
+    
+    stream = await storage_service.open_object_stream(storage_path, range_header, request.method)
+    if stream is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Audio file is missing from storage"
+        )
+    
+    headers.update(stream.headers)
+    media_type = headers.pop("content-type", None)
+    if stream.status_code == status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE or request.method == "HEAD":
+        # No body is sent, so the pooled upstream connection is released here
+        await stream.aclose()
+        if stream.status_code == status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE:
+            return Response(status_code=stream.status_code, headers=headers)
+    
+    if stream.local_path:
+        return RangeFileResponse(stream.local_path, stream.start, stream.end, stream.status_code, headers, media_type)
+    
+    if request.method == "HEAD":
+        return Response(status_code=stream.status_code, headers=headers, media_type=media_type)
+    
+    # Also closes the upstream response if the client goes away before the body starts
+    return StreamingResponse(
+        stream.body,
+        status_code=stream.status_code,
+        headers=headers,
+        media_type=media_type,
+        background=BackgroundTask(stream.aclose)
+    )
+
+
+@router.get("/{record_id}/waveform")
+async def get_waveform(
+    record_id: str,
+    level: Optional[int] = None,
+    current_user: User = Depends(get_current_user)
+):
+    """Get the precomputed waveform peaks for a record's audio"""
+    record = await record_service.get_record_by_id(record_id, current_user.id)
+    if not record:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Record not found"
+        )
+    
+    waveform = await waveform_service.get_waveform(current_user.id, record_id, level)
+    if waveform is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No waveform found for this record"
+        )
+    
+    return waveform
@@ -0,0 +1,198 @@
+from fastapi import APIRouter, HTTPException, status, Depends, Request, UploadFile, File
+from app.models.direct_upload import DirectUploadCreate, DirectUpload, DirectUploadFinalize
+from app.models.upload_job import UploadJob
+from app.models.upload_session import UploadSessionCreate, UploadSession, UploadSessionStatus, UploadChunk
+from app.models.user import User
+from app.services.direct_upload_service import direct_upload_service, DirectUploadError
+from app.services.record_service import record_service
+from app.services.storage_service import build_audio_filename
+from app.services.upload_job_service import upload_job_service, UploadJobError
+from app.services.upload_session_service import upload_session_service, UploadSessionError
+from app.api.deps import get_current_user
+from app.core.streaming import iter_upload_file
+
+router = APIRouter(prefix="/records", tags=["uploads"])
+
+
+async def _get_session_or_404(record_id: str, session_id: str, user_id: str) -> UploadSession:
+    session = await upload_session_service.get_session(session_id, record_id, user_id)
+    if not session:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Upload session not found"
+        )
+    return session
+
+
+@router.post("/{record_id}/upload-sessions", response_model=UploadSession, status_code=status.HTTP_201_CREATED)
+async def create_upload_session(
+    record_id: str,
+    session_data: UploadSessionCreate,
+    current_user: User = Depends(get_current_user)
+):
+    """Start a resumable chunked upload for a record"""
+    record = await record_service.get_record_by_id(record_id, current_user.id)
+    if not record:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Record not found"
+        )
+
+    if not session_data.content_type.startswith("audio/"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="File must be an audio file"
+        )
+
+    try:
+        return await upload_session_service.create_session(record_id, current_user.id, session_data)
+    except UploadSessionError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.get("/{record_id}/upload-sessions/{session_id}", response_model=UploadSessionStatus)
+async def get_upload_session(
+    record_id: str,
+    session_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Get an upload session and the chunks received so far"""
+    session = await _get_session_or_404(record_id, session_id, current_user.id)
+    return await upload_session_service.get_session_status(session)
+
+
+@router.put("/{record_id}/upload-sessions/{session_id}/chunks/{chunk_index}", response_model=UploadChunk)
+async def put_upload_chunk(
+    record_id: str,
+    session_id: str,
+    chunk_index: int,
+    request: Request,
+    current_user: User = Depends(get_current_user)
+):
+    """Upload one numbered chunk as the raw request body"""
+    session = await _get_session_or_404(record_id, session_id, current_user.id)
+    try:
+        return await upload_session_service.put_chunk(session, chunk_index, request.stream())
+    except UploadSessionError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.post("/{record_id}/upload-sessions/{session_id}/commit")
+async def commit_upload_session(
+    record_id: str,
+    session_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Assemble the uploaded chunks into the record's audio file"""
+    session = await _get_session_or_404(record_id, session_id, current_user.id)
+    try:
+        updated_record = await upload_session_service.commit_session(session)
+    except UploadSessionError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    if not updated_record:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to upload audio to storage"
+        )
+
+    return {
+        "message": "Audio file uploaded successfully",
+        "audio_url": updated_record.audio_file_path,
+        "record": updated_record
+    }
+
+
+@router.delete("/{record_id}/upload-sessions/{session_id}")
+async def abort_upload_session(
+    record_id: str,
+    session_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Cancel an upload session and discard its chunks"""
+    session = await _get_session_or_404(record_id, session_id, current_user.id)
+    await upload_session_service.abort_session(session)
+    return {"message": "Upload session cancelled"}
+
+
+@router.post("/{record_id}/upload-jobs", response_model=UploadJob, status_code=status.HTTP_202_ACCEPTED)
+async def create_upload_job(
+    record_id: str,
+    audio_file: UploadFile = File(...),
+    current_user: User = Depends(get_current_user)
+):
+    """Accept an audio file and store it in the background; poll /jobs/{job_id} for the outcome"""
+    record = await record_service.get_record_by_id(record_id, current_user.id)
+    if not record:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Record not found"
+        )
+
+    if not audio_file.content_type.startswith("audio/"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="File must be an audio file"
+        )
+
+    try:
+        return await upload_job_service.enqueue_upload(
+            record_id,
+            current_user.id,
+            iter_upload_file(audio_file),
+            build_audio_filename(record_id, audio_file.filename),
+            audio_file.content_type
+        )
+    except UploadJobError as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+
+
+@router.post("/{record_id}/direct-uploads", response_model=DirectUpload, status_code=status.HTTP_201_CREATED)
+async def create_direct_upload(
+    record_id: str,
+    upload_data: DirectUploadCreate,
+    current_user: User = Depends(get_current_user)
+):
+    """Get a short-lived URL to PUT the audio file straight to storage"""
+    record = await record_service.get_record_by_id(record_id, current_user.id)
+    if not record:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Record not found"
+        )
+
+    if not upload_data.content_type.startswith("audio/"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="File must be an audio file"
+        )
+
+    try:
+        return await direct_upload_service.create_upload(record_id, current_user.id, upload_data)
+    except DirectUploadError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.post("/{record_id}/direct-uploads/finalize")
+async def finalize_direct_upload(
+    record_id: str,
+    finalize_data: DirectUploadFinalize,
+    current_user: User = Depends(get_current_user)
+):
+    """Attach a directly uploaded file to the record once the PUT has finished"""
+    try:
+        updated_record = await direct_upload_service.finalize_upload(record_id, current_user.id, finalize_data.upload_token)
+    except DirectUploadError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    if not updated_record:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Record not found"
+        )
+
+    return {
+        "message": "Audio file uploaded successfully",
+        "audio_url": updated_record.audio_file_path,
+        "record": updated_record
+    }
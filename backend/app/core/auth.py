@@ -1,12 +1,15 @@
-from datetime import datetime, timedelta
-from typing import Optional
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from app.core.config import settings
+from app.core.database import get_db, execute
 from app.models.user import User
 import httpx
+import time
+import uuid
 
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -21,13 +24,122 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
-        expire = datetime.utcnow() + timedelta(minutes=settings.access_token_expire_minutes)
+        expire = datetime.utcnow() + timedelta(minutes=settings.jwt_expire_minutes)
     
     to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(to_encode, settings.jwt_secret_key, algorithm=settings.jwt_algorithm)
     return encoded_jwt
 
 
+# Claims copied from the user row into self-contained access tokens
+PROFILE_CLAIMS = ("email", "name", "picture", "google_id", "created_at", "updated_at")
+
+
+class RevocationList:
+    """Revoked token IDs and per-user cut-offs, held in memory until the tokens expire.
+    
+    Each process keeps its own list, so a revoked access token keeps working in
+    other processes until it expires, at most jwt_expire_minutes. Refresh tokens
+    live for days, so they are also spent in the database (spend_refresh_token),
+    which every process checks before issuing new tokens.
+    """
+    
+    def __init__(self):
+        self.tokens: Dict[str, float] = {}  # jti -> exp
+        self.users: Dict[str, int] = {}  # user_id -> tokens issued up to this second are revoked
+    
+    def revoke(self, payload: dict):
+        self._purge()
+        if payload.get("jti"):
+            self.tokens[payload["jti"]] = payload.get("exp", time.time())
+    
+    def revoke_user(self, user_id: str):
+        """Revoke every token issued to the user so far.
+        
+        iat only has whole seconds, so the cut-off is the current whole second
+        and tokens issued later within that same second are revoked as well.
+        """
+        self._purge()
+        self.users[user_id] = int(time.time())
+    
+    def is_revoked(self, payload: dict) -> bool:
+        if payload.get("jti") in self.tokens:
+            return True
+        cutoff = self.users.get(payload.get("sub"))
+        return cutoff is not None and int(payload.get("iat", 0)) <= cutoff
+    
+    def _purge(self):
+        now = time.time()
+        self.tokens = {jti: exp for jti, exp in self.tokens.items() if exp > now}
+        # No token outlives the refresh lifetime, so older cut-offs match nothing
+        horizon = now - settings.jwt_refresh_expire_days * 86400
+        self.users = {user_id: cutoff for user_id, cutoff in self.users.items() if cutoff > horizon}
+
+
+revocation_list = RevocationList()
+
+
+def create_session_tokens(user: User) -> dict:
+    """Issue an access token carrying the user's profile plus a refresh token to renew it"""
+    now = datetime.utcnow()
+    profile = {claim: getattr(user, claim) for claim in PROFILE_CLAIMS}
+    profile["created_at"] = user.created_at.isoformat()
+    profile["updated_at"] = user.updated_at.isoformat()
+    access_token = create_access_token(
+        {"sub": user.id, "typ": "access", "jti": uuid.uuid4().hex, "iat": now, "profile": profile},
+        timedelta(minutes=settings.jwt_expire_minutes)
+    )
+    refresh_token = create_access_token(
+        {"sub": user.id, "typ": "refresh", "jti": uuid.uuid4().hex, "iat": now},
+        timedelta(days=settings.jwt_refresh_expire_days)
+    )
+    return {
+        "access_token": access_token,
+        "refresh_token": refresh_token,
+        "token_type": "bearer",
+        "expires_in": settings.jwt_expire_minutes * 60,
+    }
+
+
+async def spend_refresh_token(payload: dict) -> bool:
+    """Record a refresh token as used in the database; False if any process already spent it"""
+    result = await execute(get_db().rpc("spend_refresh_token", {
+        "p_jti": payload["jti"],
+        "p_expires_at": datetime.fromtimestamp(payload["exp"], timezone.utc).isoformat(),
+    }))
+    return bool(result.data)
+
+
+def access_token_payload(token: str) -> Optional[dict]:
+    """Verify a token presented as a bearer credential; refresh tokens and grants do not qualify"""
+    payload = verify_token(token)
+    # Tokens issued before session tokens carry no typ
+    if payload is None or payload.get("typ", "access") != "access":
+        return None
+    if revocation_list.is_revoked(payload):
+        return None
+    return payload
+
+
+def refresh_token_payload(token: str) -> Optional[dict]:
+    """Verify a refresh token that has not been used or revoked yet"""
+    payload = verify_token(token)
+    if payload is None or payload.get("typ") != "refresh" or not payload.get("sub") or not payload.get("jti"):
+        return None
+    if revocation_list.is_revoked(payload):
+        return None
+    return payload
+
+
+async def user_from_payload(payload: dict) -> Optional[User]:
+    """Build the user from a verified access token: from its claims without I/O when it has them"""
+    profile = payload.get("profile")
+    if profile is not None:
+        return User(id=payload["sub"], **profile)
+    from app.services.user_service import user_service
+    return await user_service.get_cached_user(payload["sub"])
+
+
 def verify_token(token: str) -> Optional[dict]:
     """Verify JWT token"""
     try:
@@ -70,7 +182,7 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> Optional[User
     )
     
     try:
-        payload = verify_token(token)
+        payload = access_token_payload(token)
         if payload is None:
             raise credentials_exception
         user_id: str = payload.get("sub")
@@ -79,9 +191,7 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> Optional[User
     except JWTError:
         raise credentials_exception
     
-    # Get user from database
-    from app.services.user_service import user_service
-    user = await user_service.get_user_by_id(user_id)
+    user = await user_from_payload(payload)
     if user is None:
         raise credentials_exception
     return user
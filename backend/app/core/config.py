@@ -1,17 +1,20 @@
-from pydantic import BaseSettings, Field
+from pydantic import BaseSettings, Field, validator
 import os
-from typing import Optional
+from typing import List, Optional
 
 
 class Settings(BaseSettings):
     # Database Configuration
     supabase_url: str = Field(default="https://your-project.supabase.co")
     supabase_key: str = Field(default="your-supabase-anon-key")
+    supabase_service_key: str = Field(default="")
     
     # JWT Configuration
     jwt_secret_key: str = Field(default="your-secret-key")
     jwt_algorithm: str = Field(default="HS256")
     jwt_expire_minutes: int = Field(default=30)
+    jwt_self_contained: bool = Field(default=False)  # embed the profile in access tokens and issue refresh tokens
+    jwt_refresh_expire_days: int = Field(default=30)
     
     # Google OAuth Configuration
     google_client_id: str = Field(default="774653109986-mt4kacjdb5t5j34bgq05lnd6f360s67b.apps.googleusercontent.com")
@@ -22,21 +25,157 @@ class Settings(BaseSettings):
     cors_origins: str = "http://localhost:3000,http://localhost:5173,https://*.vercel.app"
     upload_dir: str = "uploads"
     
+    # I/O Concurrency Configuration
+    db_max_workers: int = Field(default=16)  # threads running blocking supabase calls
+    http_max_connections: int = Field(default=50)
+    http_max_keepalive_connections: int = Field(default=20)
+    
+    # Storage Backend Configuration
+    storage_backend: str = Field(default="supabase")  # "supabase" or "local"
+    local_storage_dir: Optional[str] = None  # defaults to upload_dir
+    local_storage_base_url: str = Field(default="http://localhost:8000")
+    
+    # Upload Streaming Configuration
+    upload_chunk_size: int = Field(default=1024 * 1024)  # 1MB per read
+    storage_timeout: float = Field(default=120.0)
+    upload_session_chunk_size: int = Field(default=5 * 1024 * 1024)  # 5MB per chunk
+    upload_session_max_chunk_size: int = Field(default=64 * 1024 * 1024)  # largest chunk_size a client may ask for
+    upload_session_ttl_hours: int = Field(default=24)
+    bucket_check_ttl_seconds: int = Field(default=3600)
+    probe_head_bytes: int = Field(default=256 * 1024)  # leading bytes kept for header parsing
+    probe_tail_bytes: int = Field(default=64 * 1024)  # trailing bytes kept for Ogg/WebM end timestamps
+    spool_dir: Optional[str] = None  # temp dir for spooled uploads, system default if unset
+    storage_dedup_enabled: bool = Field(default=False)  # store audio once per SHA-256 digest
+    storage_remove_batch_size: int = Field(default=1000)  # Storage API limit per remove call
+    bulk_max_items: int = Field(default=1000)
+    record_insert_chunk_size: int = Field(default=500)  # rows per multi-row insert
+    import_max_bytes: int = Field(default=100 * 1024 * 1024)  # CSV/JSONL import upload limit
+    import_max_errors: int = Field(default=1000)  # failed rows listed in an import report
+    
+    # Direct-to-storage uploads
+    direct_upload_ttl_seconds: int = Field(default=3600)  # the PUT and the finalize must both happen within this
+    direct_upload_max_bytes: int = Field(default=50 * 1024 * 1024)  # matches the bucket's file size limit
+    
+    # Background upload jobs
+    upload_job_workers: int = Field(default=2)  # 0 disables POST /records/{id}/upload-jobs
+    upload_job_dir: Optional[str] = None  # durable spool dir, defaults to {upload_dir}/jobs
+    upload_job_host: Optional[str] = None  # owner of this spool dir, defaults to the hostname; processes sharing the dir share it
+    upload_job_max_pending: int = Field(default=100)
+    upload_job_max_attempts: int = Field(default=3)
+    upload_job_retry_delay: float = Field(default=10.0)  # seconds, multiplied by the attempt number
+    upload_job_stale_seconds: int = Field(default=900)  # a 'processing' job without a heartbeat this long is taken over on startup
+    
+    # Storage reconciliation (reconcile_storage.py)
+    reconcile_page_size: int = Field(default=1000)  # entries per storage list call
+    reconcile_batch_size: int = Field(default=200)  # record folders checked per database query
+    reconcile_concurrency: int = Field(default=8)  # folders listed at once
+    reconcile_grace_hours: float = Field(default=24)  # never delete objects younger than this
+    
+    # Export Configuration
+    export_concurrency: int = Field(default=4)  # audio objects fetched ahead while writing the archive
+    export_queue_chunks: int = Field(default=4)  # upload_chunk_size chunks buffered per object
+    
+    # Record Cache Configuration
+    record_cache_size: int = Field(default=2048)  # records and listing pages held per process; 0 disables
+    record_cache_ttl_seconds: float = Field(default=30)  # bounds staleness from writes in other processes
+    
+    # User Cache Configuration (authentication)
+    user_cache_size: int = Field(default=10000)  # resolved users held per process; 0 disables
+    user_cache_ttl_seconds: float = Field(default=60)  # bounds staleness from writes in other processes
+    
+    # Transcoding Configuration
+    transcode_enabled: bool = Field(default=False)
+    transcode_codec: str = Field(default="opus")  # "opus" or "flac"
+    transcode_bitrate: str = Field(default="32k")
+    transcode_keep_original: bool = Field(default=True)
+    transcode_timeout: int = Field(default=300)
+    ffmpeg_path: str = Field(default="ffmpeg")
+    audio_workers: int = Field(default=2)  # processes shared by transcoding and waveform generation
+    
+    # Waveform Configuration
+    waveform_enabled: bool = Field(default=False)
+    waveform_sample_rate: int = Field(default=8000)  # decode rate for non-WAV input
+    waveform_levels: List[int] = Field(default=[256, 1024, 4096, 16384])  # samples per peak, finest first
+    
     # Fixed Production URLs (to avoid URL change issues)
     production_backend_url: str = "https://hvr-huzaifa-backend.vercel.app"
     production_frontend_url: str = "https://hvr-huzaifa-frontend.vercel.app"
     
+    @validator("waveform_levels")
+    def _check_waveform_levels(cls, levels: List[int]) -> List[int]:
+        # Coarser levels are built by grouping the finest one, so they must divide evenly
+        if not levels or min(levels) <= 0:
+            raise ValueError("waveform_levels must be positive sample counts")
+        base = min(levels)
+        uneven = [level for level in levels if level % base]
+        if uneven:
+            raise ValueError(f"waveform_levels must be multiples of {base}, got {uneven}")
+        return levels
+
     class Config:
         env_file = ".env"
         fields = {
             "supabase_url": {"env": "SUPABASE_URL"},
             "supabase_key": {"env": "SUPABASE_KEY"},
+            "supabase_service_key": {"env": "SUPABASE_SERVICE_KEY"},
             "jwt_secret_key": {"env": "JWT_SECRET_KEY"},
+            "jwt_self_contained": {"env": "JWT_SELF_CONTAINED"},
+            "jwt_refresh_expire_days": {"env": "JWT_REFRESH_EXPIRE_DAYS"},
             "google_client_id": {"env": "GOOGLE_CLIENT_ID"},
             "google_client_secret": {"env": "GOOGLE_CLIENT_SECRET"},
             "google_redirect_uri": {"env": "GOOGLE_REDIRECT_URI"},
             "cors_origins": {"env": "CORS_ORIGINS"},
             "upload_dir": {"env": "UPLOAD_DIR"},
+            "db_max_workers": {"env": "DB_MAX_WORKERS"},
+            "http_max_connections": {"env": "HTTP_MAX_CONNECTIONS"},
+            "http_max_keepalive_connections": {"env": "HTTP_MAX_KEEPALIVE_CONNECTIONS"},
+            "storage_backend": {"env": "STORAGE_BACKEND"},
+            "local_storage_dir": {"env": "LOCAL_STORAGE_DIR"},
+            "local_storage_base_url": {"env": "LOCAL_STORAGE_BASE_URL"},
+            "upload_chunk_size": {"env": "UPLOAD_CHUNK_SIZE"},
+            "storage_timeout": {"env": "STORAGE_TIMEOUT"},
+            "upload_session_chunk_size": {"env": "UPLOAD_SESSION_CHUNK_SIZE"},
+            "upload_session_max_chunk_size": {"env": "UPLOAD_SESSION_MAX_CHUNK_SIZE"},
+            "upload_session_ttl_hours": {"env": "UPLOAD_SESSION_TTL_HOURS"},
+            "bucket_check_ttl_seconds": {"env": "BUCKET_CHECK_TTL_SECONDS"},
+            "probe_head_bytes": {"env": "PROBE_HEAD_BYTES"},
+            "probe_tail_bytes": {"env": "PROBE_TAIL_BYTES"},
+            "spool_dir": {"env": "SPOOL_DIR"},
+            "storage_dedup_enabled": {"env": "STORAGE_DEDUP_ENABLED"},
+            "storage_remove_batch_size": {"env": "STORAGE_REMOVE_BATCH_SIZE"},
+            "bulk_max_items": {"env": "BULK_MAX_ITEMS"},
+            "record_insert_chunk_size": {"env": "RECORD_INSERT_CHUNK_SIZE"},
+            "import_max_bytes": {"env": "IMPORT_MAX_BYTES"},
+            "import_max_errors": {"env": "IMPORT_MAX_ERRORS"},
+            "direct_upload_ttl_seconds": {"env": "DIRECT_UPLOAD_TTL_SECONDS"},
+            "direct_upload_max_bytes": {"env": "DIRECT_UPLOAD_MAX_BYTES"},
+            "upload_job_workers": {"env": "UPLOAD_JOB_WORKERS"},
+            "upload_job_dir": {"env": "UPLOAD_JOB_DIR"},
+            "upload_job_host": {"env": "UPLOAD_JOB_HOST"},
+            "upload_job_max_pending": {"env": "UPLOAD_JOB_MAX_PENDING"},
+            "upload_job_max_attempts": {"env": "UPLOAD_JOB_MAX_ATTEMPTS"},
+            "upload_job_retry_delay": {"env": "UPLOAD_JOB_RETRY_DELAY"},
+            "upload_job_stale_seconds": {"env": "UPLOAD_JOB_STALE_SECONDS"},
+            "export_concurrency": {"env": "EXPORT_CONCURRENCY"},
+            "export_queue_chunks": {"env": "EXPORT_QUEUE_CHUNKS"},
+            "record_cache_size": {"env": "RECORD_CACHE_SIZE"},
+            "record_cache_ttl_seconds": {"env": "RECORD_CACHE_TTL_SECONDS"},
+            "reconcile_page_size": {"env": "RECONCILE_PAGE_SIZE"},
+            "reconcile_batch_size": {"env": "RECONCILE_BATCH_SIZE"},
+            "reconcile_concurrency": {"env": "RECONCILE_CONCURRENCY"},
+            "reconcile_grace_hours": {"env": "RECONCILE_GRACE_HOURS"},
+            "user_cache_size": {"env": "USER_CACHE_SIZE"},
+            "user_cache_ttl_seconds": {"env": "USER_CACHE_TTL_SECONDS"},
+            "transcode_enabled": {"env": "TRANSCODE_ENABLED"},
+            "transcode_codec": {"env": "TRANSCODE_CODEC"},
+            "transcode_bitrate": {"env": "TRANSCODE_BITRATE"},
+            "transcode_keep_original": {"env": "TRANSCODE_KEEP_ORIGINAL"},
+            "transcode_timeout": {"env": "TRANSCODE_TIMEOUT"},
+            "ffmpeg_path": {"env": "FFMPEG_PATH"},
+            "audio_workers": {"env": "AUDIO_WORKERS"},
+            "waveform_enabled": {"env": "WAVEFORM_ENABLED"},
+            "waveform_sample_rate": {"env": "WAVEFORM_SAMPLE_RATE"},
+            "waveform_levels": {"env": "WAVEFORM_LEVELS"},
         }
 
 
@@ -1,12 +1,16 @@
 from supabase import create_client, Client
 from app.core.config import settings
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+import asyncio
+import functools
 
 
 class Database:
     def __init__(self):
         self.client: Optional[Client] = None
         self.service_client: Optional[Client] = None
+        self.executor: Optional[ThreadPoolExecutor] = None
     
     def connect(self):
         """Create database connection"""
@@ -22,6 +26,9 @@ class Database:
         """Close database connection"""
         self.client = None
         self.service_client = None
+        if self.executor:
+            self.executor.shutdown(wait=False)
+            self.executor = None
     
     def get_client(self) -> Client:
         """Get database client"""
@@ -34,6 +41,15 @@ class Database:
         if not self.service_client:
             self.connect_service()
         return self.service_client
+    
+    def get_executor(self) -> ThreadPoolExecutor:
+        """Get the bounded thread pool that runs blocking client calls"""
+        if not self.executor:
+            self.executor = ThreadPoolExecutor(
+                max_workers=settings.db_max_workers,
+                thread_name_prefix="supabase-io"
+            )
+        return self.executor
 
 
 # Database instance
@@ -49,3 +65,13 @@ def get_service_db() -> Client:
     """Dependency to get service database client with admin privileges"""
     return db.get_service_client()
 
+
+async def run_blocking(func: Callable, *args, **kwargs) -> Any:
+    """Run a blocking supabase call on the I/O thread pool instead of the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(db.get_executor(), functools.partial(func, *args, **kwargs))
+
+
+async def execute(query) -> Any:
+    """Execute a supabase query builder without blocking the event loop"""
+    return await run_blocking(query.execute)
@@ -0,0 +1,110 @@
+from typing import Optional, Tuple
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+from app.core.config import settings
+from app.core.database import run_blocking
+import mmap
+import os
+
+
+class RangeNotSatisfiable(Exception):
+    """Raised when a Range header does not overlap the resource"""
+
+
+def parse_range(range_header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single 'bytes=' range into an inclusive (start, end) pair.
+
+    Returns None when the whole resource should be sent: no header, a unit
+    other than bytes, or several ranges (which we are allowed to ignore).
+    """
+    if not range_header or not range_header.startswith("bytes="):
+        return None
+    spec = range_header[len("bytes="):].strip()
+    if "," in spec:
+        return None
+    if size == 0:
+        # An empty resource has no byte a range could select
+        raise RangeNotSatisfiable()
+
+    start_text, _, end_text = spec.partition("-")
+    try:
+        if start_text == "":
+            # Suffix range: the last N bytes
+            length = int(end_text)
+            if length <= 0:
+                raise RangeNotSatisfiable()
+            return max(size - length, 0), size - 1
+        start = int(start_text)
+        end = int(end_text) if end_text else size - 1
+    except ValueError:
+        return None
+
+    if start >= size or start > end:
+        raise RangeNotSatisfiable()
+    return start, min(end, size - 1)
+
+
+class RangeFileResponse(Response):
+    """Send part or all of a local file without reading it through Python buffers.
+
+    Uses the ASGI zero-copy send extension (sendfile) when the server offers
+    it, otherwise sends slices of a memory-mapped view of the file.
+    """
+
+    def __init__(self, path: str, start: int, end: int, status_code: int = 200, headers: Optional[dict] = None, media_type: Optional[str] = None):
+        super().__init__(status_code=status_code, headers=headers, media_type=media_type)
+        self.path = path
+        self.start = start
+        self.end = end
+        self.headers["content-length"] = str(max(end - start + 1, 0))
+        self.headers["accept-ranges"] = "bytes"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+
+        count = self.end - self.start + 1
+        if scope.get("method") == "HEAD" or count <= 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        with open(self.path, "rb") as f:
+            if "http.response.zerocopysend" in scope.get("extensions", {}):
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": f,
+                    "offset": self.start,
+                    "count": count,
+                    "more_body": False,
+                })
+                return
+
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                position = self.start
+                while position <= self.end:
+                    stop = min(position + settings.upload_chunk_size, self.end + 1)
+                    # Page faults on the mapping can hit the disk, so slice it off the loop
+                    body = await run_blocking(mapped.__getitem__, slice(position, stop))
+                    position = stop
+                    await send({"type": "http.response.body", "body": body, "more_body": position <= self.end})
+
+
+def file_etag(path: str) -> str:
+    """Strong validator for a local file from its size and modification time"""
+    stat = os.stat(path)
+    return f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header matches an ETag (weak comparison)"""
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    bare = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == bare:
+            return True
+    return False
@@ -0,0 +1,27 @@
+from typing import Optional
+import base64
+import json
+
+
+class InvalidCursor(ValueError):
+    """Raised when a client sends a cursor this server did not issue"""
+
+
+def encode_cursor(position: dict) -> str:
+    """Opaque, URL-safe token for a keyset position"""
+    raw = json.dumps(position, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[dict]:
+    """Keyset position from a cursor, or None for the first page"""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        position = json.loads(raw)
+    except (ValueError, UnicodeDecodeError):
+        raise InvalidCursor("Invalid cursor")
+    if not isinstance(position, dict):
+        raise InvalidCursor("Invalid cursor")
+    return position
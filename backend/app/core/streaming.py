@@ -0,0 +1,110 @@
+from typing import AsyncIterator, Optional
+from fastapi import UploadFile
+from app.core.config import settings
+from app.core.database import run_blocking
+import aiofiles
+import hashlib
+import os
+import tempfile
+
+
+async def iter_upload_file(upload_file: UploadFile, chunk_size: Optional[int] = None) -> AsyncIterator[bytes]:
+    """Yield an uploaded file in fixed-size chunks instead of reading it whole"""
+    chunk_size = chunk_size or settings.upload_chunk_size
+    while True:
+        chunk = await upload_file.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+
+class ByteCounter:
+    """Pass chunks through while counting how many bytes went by"""
+
+    def __init__(self, chunks: AsyncIterator[bytes]):
+        self.chunks = chunks
+        self.total = 0
+
+    async def __aiter__(self):
+        async for chunk in self.chunks:
+            self.total += len(chunk)
+            yield chunk
+
+
+class StreamDigest:
+    """Pass chunks through while hashing them"""
+
+    def __init__(self):
+        self.digest = hashlib.sha256()
+
+    async def observe(self, chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        async for chunk in chunks:
+            self.digest.update(chunk)
+            yield chunk
+
+    def hexdigest(self) -> str:
+        return self.digest.hexdigest()
+
+
+async def spool_to_file(chunks: AsyncIterator[bytes], suffix: str = "") -> str:
+    """Write chunks to a temporary file on disk and return its path"""
+    fd, path = tempfile.mkstemp(suffix=suffix, dir=settings.spool_dir)
+    os.close(fd)
+    try:
+        async with aiofiles.open(path, "wb") as f:
+            async for chunk in chunks:
+                await f.write(chunk)
+    except Exception:
+        os.remove(path)
+        raise
+    return path
+
+
+async def write_durably(chunks: AsyncIterator[bytes], path: str) -> int:
+    """Write chunks to path and flush them to disk before returning the byte count"""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    total = 0
+    try:
+        async with aiofiles.open(path, "wb") as f:
+            async for chunk in chunks:
+                await f.write(chunk)
+                total += len(chunk)
+            await f.flush()
+            await run_blocking(os.fsync, f.fileno())
+    except Exception:
+        remove_quietly(path)
+        raise
+    # The new directory entry must survive a crash too
+    await run_blocking(fsync_directory, directory)
+    return total
+
+
+def fsync_directory(directory: str):
+    """Persist renames and new entries in a directory"""
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+async def iter_file(path: str, chunk_size: Optional[int] = None) -> AsyncIterator[bytes]:
+    """Yield a file on disk in fixed-size chunks"""
+    chunk_size = chunk_size or settings.upload_chunk_size
+    async with aiofiles.open(path, "rb") as f:
+        while True:
+            chunk = await f.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+
+def remove_quietly(*paths: Optional[str]):
+    """Delete temporary files, ignoring ones that are already gone"""
+    for path in paths:
+        if path:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,22 @@
+from pydantic import BaseModel
+from typing import Dict, Optional
+from datetime import datetime
+
+
+class DirectUploadCreate(BaseModel):
+    filename: str
+    content_type: str
+    size: Optional[int] = None
+
+
+class DirectUpload(BaseModel):
+    upload_url: str
+    method: str = "PUT"
+    headers: Dict[str, str] = {}
+    storage_path: str
+    upload_token: str  # send back to the finalize endpoint once the PUT succeeded
+    expires_at: datetime
+
+
+class DirectUploadFinalize(BaseModel):
+    upload_token: str
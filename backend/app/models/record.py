@@ -1,10 +1,10 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import Any, List, Optional
 from datetime import datetime
 
 
 class RecordBase(BaseModel):
-    title: str
+    title: str = Field(max_length=255)  # records.title is VARCHAR(255)
     script: str
     description: Optional[str] = None
 
@@ -14,7 +14,7 @@ class RecordCreate(RecordBase):
 
 
 class RecordUpdate(BaseModel):
-    title: Optional[str] = None
+    title: Optional[str] = Field(default=None, max_length=255)
     script: Optional[str] = None
     description: Optional[str] = None
     audio_file_path: Optional[str] = None
@@ -24,7 +24,13 @@ class Record(RecordBase):
     id: str
     user_id: str
     audio_file_path: Optional[str] = None
+    original_audio_file_path: Optional[str] = None
+    audio_digest: Optional[str] = None
     duration: Optional[float] = None
+    sample_rate: Optional[int] = None
+    channels: Optional[int] = None
+    codec: Optional[str] = None
+    audio_size: Optional[int] = None  # bytes of the stored (possibly transcoded) audio
     created_at: datetime
     updated_at: datetime
     
@@ -37,3 +43,89 @@ class Record(RecordBase):
 
 class RecordInDB(Record):
     pass
+
+
+class RecordSummary(BaseModel):
+    """Listing view of a record: everything but the full script and description"""
+    id: str
+    user_id: str
+    title: str
+    script_preview: str  # first 200 characters, computed by the database
+    script_length: int
+    audio_file_path: Optional[str] = None
+    duration: Optional[float] = None
+    created_at: datetime
+    updated_at: datetime
+
+
+class RecordPage(BaseModel):
+    items: List[Record]
+    next_cursor: Optional[str] = None  # pass back as ?cursor= for the next page; None on the last page
+
+
+class RecordStats(BaseModel):
+    """Per-user totals, maintained by database triggers as records change"""
+    record_count: int = 0
+    audio_count: int = 0  # records with audio attached
+    total_duration: float = 0  # seconds, over records whose duration is known
+    total_audio_size: int = 0  # bytes, over records whose size is known
+    updated_at: Optional[datetime] = None
+
+
+class RecordBatchCreate(BaseModel):
+    # Items are validated one by one so a bad item does not reject the whole batch
+    records: List[Any]
+
+
+class RecordBatchResult(BaseModel):
+    index: int
+    status: str  # "created", "invalid" or "error"
+    id: Optional[str] = None
+    error: Optional[str] = None
+
+
+class RecordBatchResponse(BaseModel):
+    created: int
+    results: List[RecordBatchResult]
+
+
+class RecordImportError(BaseModel):
+    line: int  # 1-based line in the uploaded file where the row ends
+    error: str
+
+
+class RecordImportResponse(BaseModel):
+    created: int
+    invalid: int
+    failed: int
+    errors: List[RecordImportError]
+    errors_truncated: bool = False  # more rows failed than are listed
+
+
+class RecordBulkDelete(BaseModel):
+    record_ids: List[str]
+
+
+class RecordBulkDeleteResult(BaseModel):
+    id: str
+    status: str  # "deleted", "not_found" or "error"
+
+
+class RecordBulkDeleteResponse(BaseModel):
+    deleted: int
+    results: List[RecordBulkDeleteResult]
+
+
+class RecordSummaryPage(BaseModel):
+    items: List[RecordSummary]
+    next_cursor: Optional[str] = None
+
+
+class RecordSearchResult(RecordSummary):
+    rank: float
+    snippet: str  # matching script fragment with terms wrapped in <b></b>
+
+
+class RecordSearchPage(BaseModel):
+    items: List[RecordSearchResult]
+    next_cursor: Optional[str] = None
@@ -0,0 +1,28 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+from app.models.record import Record
+
+
+class UploadJob(BaseModel):
+    id: str
+    record_id: str
+    user_id: str
+    filename: str
+    content_type: str
+    size: int
+    spool_host: Optional[str] = None  # the host whose spool dir holds the upload
+    status: str  # queued, processing, succeeded or failed
+    attempts: int = 0
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class UploadJobStatus(UploadJob):
+    bytes_processed: Optional[int] = None  # live progress while this server is storing the upload
+    record: Optional[Record] = None  # the updated record once the job has succeeded
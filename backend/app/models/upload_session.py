@@ -0,0 +1,38 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import datetime
+
+
+class UploadSessionCreate(BaseModel):
+    filename: str
+    content_type: str
+    total_size: Optional[int] = None
+    chunk_size: Optional[int] = None
+
+
+class UploadSession(BaseModel):
+    id: str
+    record_id: str
+    user_id: str
+    filename: str
+    content_type: str
+    chunk_size: int
+    total_size: Optional[int] = None
+    status: str
+    expires_at: datetime
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class UploadChunk(BaseModel):
+    index: int
+    offset: int
+    size: int
+
+
+class UploadSessionStatus(UploadSession):
+    received_chunks: List[UploadChunk] = []
+    received_bytes: int = 0
@@ -0,0 +1,304 @@
+from dataclasses import dataclass, asdict
+from typing import AsyncIterator, Optional, Tuple
+from app.core.config import settings
+import struct
+
+
+@dataclass
+class AudioMetadata:
+    duration: Optional[float] = None
+    sample_rate: Optional[int] = None
+    channels: Optional[int] = None
+    codec: Optional[str] = None
+
+    def to_update(self) -> dict:
+        """Record fields for the values that could be determined"""
+        return {key: value for key, value in asdict(self).items() if value is not None}
+
+
+WAV_CODECS = {1: "pcm", 3: "pcm_float", 6: "alaw", 7: "mulaw", 0x55: "mp3"}
+MATROSKA_CODECS = {"A_OPUS": "opus", "A_VORBIS": "vorbis", "A_FLAC": "flac", "A_AAC": "aac", "A_MPEG/L3": "mp3"}
+
+# Matroska element IDs (with their length marker bits)
+EBML_SEGMENT = 0x18538067
+EBML_INFO = 0x1549A966
+EBML_TIMECODE_SCALE = 0x2AD7B1
+EBML_DURATION = 0x4489
+EBML_TRACKS = 0x1654AE6B
+EBML_TRACK_ENTRY = 0xAE
+EBML_CODEC_ID = 0x86
+EBML_AUDIO = 0xE1
+EBML_SAMPLING_FREQUENCY = 0xB5
+EBML_CHANNELS = 0x9F
+EBML_CLUSTER = 0x1F43B675
+EBML_CLUSTER_TIMECODE = 0xE7
+EBML_SIMPLE_BLOCK = 0xA3
+EBML_BLOCK_GROUP = 0xA0
+EBML_BLOCK = 0xA1
+
+
+class AudioProbe:
+    """Watch an upload stream and read container headers from its first and last bytes"""
+
+    def __init__(self, head_size: Optional[int] = None, tail_size: Optional[int] = None):
+        self.head_size = head_size or settings.probe_head_bytes
+        self.tail_size = tail_size or settings.probe_tail_bytes
+        self.head = bytearray()
+        self.tail = b""
+        self.total = 0
+
+    async def observe(self, chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        """Pass chunks through unchanged while remembering what the probe needs"""
+        async for chunk in chunks:
+            self.feed(chunk)
+            yield chunk
+
+    def probe_file(self, path: str) -> AudioMetadata:
+        """Probe a file on disk by reading only its head and tail"""
+        with open(path, "rb") as f:
+            self.head = bytearray(f.read(self.head_size))
+            f.seek(0, 2)
+            self.total = f.tell()
+            f.seek(max(self.total - self.tail_size, 0))
+            self.tail = f.read()
+        return self.result()
+
+    def probe_ranges(self, head: bytes, tail: bytes, total: int) -> AudioMetadata:
+        """Probe an object from separately fetched first and last bytes"""
+        self.head = bytearray(head[:self.head_size])
+        self.tail = tail[-self.tail_size:]
+        self.total = total
+        return self.result()
+
+    def feed(self, chunk: bytes):
+        if len(self.head) < self.head_size:
+            self.head += chunk[:self.head_size - len(self.head)]
+        self.tail = (self.tail + chunk[-self.tail_size:])[-self.tail_size:]
+        self.total += len(chunk)
+
+    def result(self) -> AudioMetadata:
+        """Parse whatever headers were seen; unknown formats give empty metadata"""
+        head = bytes(self.head)
+        try:
+            if head[:4] == b"RIFF" and head[8:12] == b"WAVE":
+                return self._parse_wav(head)
+            if head[:4] == b"OggS":
+                return self._parse_ogg(head)
+            if head[:4] == b"fLaC":
+                return self._parse_flac(head)
+            if head[:4] == b"\x1a\x45\xdf\xa3":
+                return self._parse_matroska(head)
+        except (struct.error, IndexError, ValueError) as e:
+            print(f"⚠️  Could not parse audio headers: {e}")
+        return AudioMetadata()
+
+    def _parse_wav(self, head: bytes) -> AudioMetadata:
+        metadata = AudioMetadata()
+        byte_rate = None
+        offset = 12
+        while offset + 8 <= len(head):
+            chunk_id = head[offset:offset + 4]
+            chunk_size = struct.unpack_from("<I", head, offset + 4)[0]
+            body = offset + 8
+            if chunk_id == b"fmt ":
+                audio_format, channels, sample_rate, byte_rate, _, bits = struct.unpack_from("<HHIIHH", head, body)
+                if audio_format == 0xFFFE and chunk_size >= 40:
+                    # WAVE_FORMAT_EXTENSIBLE keeps the real format in the sub-format GUID
+                    audio_format = struct.unpack_from("<H", head, body + 24)[0]
+                codec = WAV_CODECS.get(audio_format, f"wav_0x{audio_format:04x}")
+                metadata.codec = f"{codec}_{bits}bit" if codec.startswith("pcm") else codec
+                metadata.channels = channels
+                metadata.sample_rate = sample_rate
+            elif chunk_id == b"data":
+                data_size = chunk_size
+                if data_size in (0, 0xFFFFFFFF) or body + data_size > self.total:
+                    # Streaming writers leave the size unset; use what actually arrived
+                    data_size = self.total - body
+                if byte_rate:
+                    metadata.duration = data_size / byte_rate
+                break
+            offset = body + chunk_size + (chunk_size & 1)
+        return metadata
+
+    def _parse_ogg(self, head: bytes) -> AudioMetadata:
+        metadata = AudioMetadata()
+        segment_count = head[26]
+        packet = head[27 + segment_count:]
+        granule_rate = None
+        pre_skip = 0
+        if packet[:8] == b"OpusHead":
+            metadata.codec = "opus"
+            metadata.channels = packet[9]
+            pre_skip = struct.unpack_from("<H", packet, 10)[0]
+            metadata.sample_rate = struct.unpack_from("<I", packet, 12)[0] or 48000
+            granule_rate = 48000  # Opus granule positions always count 48 kHz samples
+        elif packet[:7] == b"\x01vorbis":
+            metadata.codec = "vorbis"
+            metadata.channels = packet[11]
+            metadata.sample_rate = struct.unpack_from("<I", packet, 12)[0]
+            granule_rate = metadata.sample_rate
+        elif packet[:5] == b"\x7fFLAC":
+            metadata.codec = "flac"
+            streaminfo = self._parse_flac(packet[9:])
+            metadata.sample_rate = streaminfo.sample_rate
+            metadata.channels = streaminfo.channels
+            granule_rate = metadata.sample_rate
+
+        granule = self._last_ogg_granule()
+        if granule_rate and granule is not None:
+            metadata.duration = max(granule - pre_skip, 0) / granule_rate
+        return metadata
+
+    def _last_ogg_granule(self) -> Optional[int]:
+        """Granule position of the last complete page header in the tail"""
+        position = len(self.tail)
+        while True:
+            position = self.tail.rfind(b"OggS", 0, position)
+            if position < 0:
+                return None
+            if position + 14 <= len(self.tail):
+                granule = struct.unpack_from("<q", self.tail, position + 6)[0]
+                if granule >= 0:
+                    return granule
+
+    def _parse_flac(self, data: bytes) -> AudioMetadata:
+        # STREAMINFO is always the first metadata block, right after the 4-byte block header
+        info = data[8:8 + 18]
+        packed = int.from_bytes(info[10:18], "big")
+        sample_rate = packed >> 44
+        channels = ((packed >> 41) & 0x7) + 1
+        total_samples = packed & 0xFFFFFFFFF
+        metadata = AudioMetadata(codec="flac", sample_rate=sample_rate or None, channels=channels)
+        if sample_rate and total_samples:
+            metadata.duration = total_samples / sample_rate
+        return metadata
+
+    def _parse_matroska(self, head: bytes) -> AudioMetadata:
+        metadata = AudioMetadata()
+        timecode_scale = 1000000
+        duration = None
+
+        for element_id, start, end in _ebml_children(head, 0, len(head)):
+            if element_id != EBML_SEGMENT:
+                continue
+            for child_id, child_start, child_end in _ebml_children(head, start, end):
+                if child_id == EBML_INFO:
+                    for info_id, info_start, info_end in _ebml_children(head, child_start, child_end):
+                        if info_id == EBML_TIMECODE_SCALE:
+                            timecode_scale = int.from_bytes(head[info_start:info_end], "big")
+                        elif info_id == EBML_DURATION:
+                            duration = _ebml_float(head[info_start:info_end])
+                elif child_id == EBML_TRACKS:
+                    self._parse_matroska_tracks(head, child_start, child_end, metadata)
+                elif child_id == EBML_CLUSTER:
+                    break
+
+        if duration is None:
+            # Recorders that stream WebM never write Duration; use the last block timestamp instead
+            duration = self._last_matroska_timecode()
+        if duration is not None:
+            metadata.duration = duration * timecode_scale / 1e9
+        return metadata
+
+    def _parse_matroska_tracks(self, data: bytes, start: int, end: int, metadata: AudioMetadata):
+        for entry_id, entry_start, entry_end in _ebml_children(data, start, end):
+            if entry_id != EBML_TRACK_ENTRY:
+                continue
+            codec_id = None
+            audio = None
+            for field_id, field_start, field_end in _ebml_children(data, entry_start, entry_end):
+                if field_id == EBML_CODEC_ID:
+                    codec_id = data[field_start:field_end].rstrip(b"\x00").decode("ascii", "replace")
+                elif field_id == EBML_AUDIO:
+                    audio = (field_start, field_end)
+            if audio is None:
+                continue
+            metadata.codec = MATROSKA_CODECS.get(codec_id, codec_id)
+            for audio_id, audio_start, audio_end in _ebml_children(data, *audio):
+                if audio_id == EBML_SAMPLING_FREQUENCY:
+                    metadata.sample_rate = int(_ebml_float(data[audio_start:audio_end]))
+                elif audio_id == EBML_CHANNELS:
+                    metadata.channels = int.from_bytes(data[audio_start:audio_end], "big")
+            return
+
+    def _last_matroska_timecode(self) -> Optional[int]:
+        """Timestamp of the last block in the last cluster found in the tail"""
+        marker = EBML_CLUSTER.to_bytes(4, "big")
+        position = self.tail.rfind(marker)
+        if position < 0:
+            return None
+        size, size_length = _read_vint(self.tail, position + 4)
+        start = position + 4 + size_length
+        end = min(start + size, len(self.tail)) if size is not None else len(self.tail)
+
+        cluster_timecode = None
+        last_block = 0
+        for element_id, element_start, element_end in _ebml_children(self.tail, start, end):
+            if element_id == EBML_CLUSTER_TIMECODE:
+                cluster_timecode = int.from_bytes(self.tail[element_start:element_end], "big")
+            elif element_id == EBML_SIMPLE_BLOCK:
+                last_block = max(last_block, _block_timecode(self.tail, element_start))
+            elif element_id == EBML_BLOCK_GROUP:
+                for child_id, child_start, _ in _ebml_children(self.tail, element_start, element_end):
+                    if child_id == EBML_BLOCK:
+                        last_block = max(last_block, _block_timecode(self.tail, child_start))
+        if cluster_timecode is None:
+            return None
+        return cluster_timecode + last_block
+
+
+def _read_vint(data: bytes, offset: int) -> Tuple[Optional[int], int]:
+    """Read an EBML variable-length size; None means 'unknown size'"""
+    first = data[offset]
+    length = 1
+    mask = 0x80
+    while length <= 8 and not first & mask:
+        mask >>= 1
+        length += 1
+    if length > 8:
+        raise ValueError("invalid EBML size")
+    value = first & (mask - 1)
+    for byte in data[offset + 1:offset + length]:
+        value = (value << 8) | byte
+    if value == (1 << (7 * length)) - 1:
+        return None, length
+    return value, length
+
+
+def _read_element_id(data: bytes, offset: int) -> Tuple[int, int]:
+    first = data[offset]
+    length = 1
+    mask = 0x80
+    while length <= 4 and not first & mask:
+        mask >>= 1
+        length += 1
+    if length > 4:
+        raise ValueError("invalid EBML element ID")
+    return int.from_bytes(data[offset:offset + length], "big"), length
+
+
+def _ebml_children(data: bytes, start: int, end: int):
+    """Yield (id, body_start, body_end) for elements in data[start:end], stopping at truncation"""
+    offset = start
+    while offset < end and offset < len(data):
+        try:
+            element_id, id_length = _read_element_id(data, offset)
+            size, size_length = _read_vint(data, offset + id_length)
+        except IndexError:
+            return
+        body_start = offset + id_length + size_length
+        body_end = end if size is None else min(body_start + size, end, len(data))
+        yield element_id, body_start, body_end
+        if size is None:
+            return
+        offset = body_start + size
+
+
+def _ebml_float(data: bytes) -> float:
+    return struct.unpack(">f" if len(data) == 4 else ">d", data)[0]
+
+
+def _block_timecode(data: bytes, offset: int) -> int:
+    """Relative timecode of a (Simple)Block: track number vint, then a signed 16-bit value"""
+    _, track_length = _read_vint(data, offset)
+    return struct.unpack_from(">h", data, offset + track_length)[0]
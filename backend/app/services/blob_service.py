@@ -0,0 +1,163 @@
+from typing import List, Optional, Tuple
+from app.core.config import settings
+from app.core.database import get_db, execute, run_blocking
+from app.services.storage_service import storage_service
+from app.core.streaming import iter_file
+from supabase import Client
+from datetime import datetime, timedelta, timezone
+import asyncio
+import hashlib
+import mimetypes
+import os
+import time
+
+
+BLOB_POLL_SECONDS = 0.5  # while waiting on another upload or deletion of the same digest
+
+
+def file_sha256(path: str) -> str:
+    """Hex SHA-256 of a file on disk, read in blocks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class BlobService:
+    """Content-addressed audio objects shared between records by reference count"""
+
+    def __init__(self):
+        self.db: Client = get_db()
+
+    def _blob_path(self, digest: str, content_type: str) -> str:
+        # The extension lets backends without object metadata serve the right type
+        extension = mimetypes.guess_extension(content_type) or ""
+        return f"blobs/sha256/{digest[:2]}/{digest}{extension}"
+
+    async def store_file(self, path: str, content_type: str, digest: Optional[str] = None) -> Optional[Tuple[str, str]]:
+        """Reference the blob for a local file, writing it only if the digest is new.
+
+        The reference is only handed out once the object is 'ready': a caller
+        that finds another upload of the same digest in flight waits for it,
+        and takes the upload over if it stalls or fails.
+
+        Returns (digest, public_url), or None if the blob could not be written.
+        """
+        if digest is None:
+            digest = await run_blocking(file_sha256, path)
+
+        blob = await self._acquire(digest, path, content_type)
+        if blob is None:
+            return None
+
+        if blob["ready"]:
+            print(f"♻️  Blob {digest[:12]} already stored, skipping upload")
+        elif blob["created"]:
+            print(f"📦 New blob {digest[:12]}, uploading")
+            if not await self._upload(digest, blob["blob_path"], path, content_type):
+                return None
+        elif not await self._wait_until_ready(digest, blob["blob_path"], path, content_type):
+            return None
+
+        return digest, storage_service.public_url(blob["blob_path"])
+
+    async def _acquire(self, digest: str, path: str, content_type: str) -> Optional[dict]:
+        deadline = time.monotonic() + settings.storage_timeout
+        while True:
+            result = await execute(self.db.rpc("acquire_audio_blob", {
+                "p_digest": digest,
+                "p_storage_path": self._blob_path(digest, content_type),
+                "p_size": os.path.getsize(path),
+                "p_content_type": content_type,
+            }))
+            if result.data:
+                return result.data[0]
+            # The previous blob for this digest is being deleted; its row goes once the object has
+            if time.monotonic() > deadline:
+                print(f"❌ Blob {digest[:12]} stayed in deletion, giving up")
+                return None
+            await asyncio.sleep(BLOB_POLL_SECONDS)
+
+    async def _upload(self, digest: str, blob_path: str, path: str, content_type: str) -> bool:
+        """Write the object for a pending blob this caller owns and mark it ready"""
+        uploaded = await storage_service.upload_object_stream(blob_path, iter_file(path), content_type, upsert=True)
+        if uploaded:
+            await execute(self.db.table("audio_blobs").update({"state": "ready", "state_changed_at": "now()"}).eq("digest", digest))
+            return True
+
+        # Let anyone waiting on this blob take the upload over straight away
+        await execute(self.db.table("audio_blobs").update({"state_changed_at": "-infinity"}).eq("digest", digest).eq("state", "pending"))
+        await self.release(digest)
+        return False
+
+    async def _wait_until_ready(self, digest: str, blob_path: str, path: str, content_type: str) -> bool:
+        """Wait for another caller's upload of the blob, taking it over if it stalls"""
+        deadline = time.monotonic() + 2 * settings.storage_timeout
+        while time.monotonic() < deadline:
+            await asyncio.sleep(BLOB_POLL_SECONDS)
+            result = await execute(self.db.table("audio_blobs").select("state").eq("digest", digest))
+            if result.data and result.data[0]["state"] == "ready":
+                return True
+
+            # Our reference keeps the row from being deleted, so it is still pending here
+            stalled_since = datetime.now(timezone.utc) - timedelta(seconds=settings.storage_timeout)
+            claimed = await execute(
+                self.db.table("audio_blobs")
+                .update({"state_changed_at": "now()"})
+                .eq("digest", digest)
+                .eq("state", "pending")
+                .lt("state_changed_at", stalled_since.isoformat())
+            )
+            if claimed.data:
+                print(f"📦 Upload of blob {digest[:12]} stalled, taking it over")
+                return await self._upload(digest, blob_path, path, content_type)
+
+        print(f"❌ Blob {digest[:12]} never became ready")
+        await self.release(digest)
+        return False
+
+    async def release(self, digest: str) -> bool:
+        """Drop one reference; the blob object is removed once nothing points at it"""
+        result = await execute(self.db.rpc("release_audio_blob", {"p_digest": digest}))
+        if not result.data or result.data[0]["remaining"] > 0:
+            return False
+        return await self._delete_unreferenced([digest]) > 0
+
+    async def release_many(self, digests: List[str]) -> int:
+        """Drop one reference per entry (repeats count twice) in one call; returns blobs removed"""
+        if not digests:
+            return 0
+        result = await execute(self.db.rpc("release_audio_blobs", {"p_digests": digests}))
+        unreferenced = [row["digest"] for row in result.data if row["remaining"] <= 0]
+        if not unreferenced:
+            return 0
+        return await self._delete_unreferenced(unreferenced)
+
+    async def _delete_unreferenced(self, digests: List[str]) -> int:
+        """Remove blobs nobody references: object first, then row, so acquire never sees a row without its object.
+
+        Marking the rows 'deleting' is the claim; acquire leaves such rows alone
+        and only the caller whose update matched goes on to delete.
+        """
+        claimed = await execute(
+            self.db.table("audio_blobs")
+            .update({"state": "deleting", "state_changed_at": "now()"})
+            .in_("digest", digests)
+            .lte("ref_count", 0)
+            .neq("state", "deleting")
+        )
+        if not claimed.data:
+            return 0
+
+        if not await storage_service.remove_objects([row["storage_path"] for row in claimed.data]):
+            # Rows stay 'deleting'; acquire clears them once they are old enough
+            return 0
+        deleted = await execute(
+            self.db.table("audio_blobs").delete().in_("digest", [row["digest"] for row in claimed.data]).eq("state", "deleting")
+        )
+        return len(deleted.data)
+
+
+# Service instance
+blob_service = BlobService()
@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from app.core.auth import create_access_token, verify_token
+from app.core.config import settings
+from app.models.direct_upload import DirectUploadCreate, DirectUpload
+from app.models.record import Record
+from app.services.audio_probe import AudioProbe
+from app.services.record_service import record_service
+from app.services.storage_service import storage_service, build_audio_filename
+
+
+GRANT_TYPE = "direct-upload"
+
+
+class DirectUploadError(Exception):
+    """Raised when a direct upload cannot be issued or finalized"""
+
+
+class DirectUploadService:
+    """Let clients upload audio straight to storage; the API only signs and finalizes"""
+
+    def create_grant(self, record_id: str, user_id: str, storage_path: str, expires_delta: timedelta) -> str:
+        """Signed token naming the one object a client may upload (no 'sub', so it cannot authenticate)"""
+        return create_access_token({
+            "typ": GRANT_TYPE,
+            "uid": user_id,
+            "rid": record_id,
+            "path": storage_path,
+        }, expires_delta)
+
+    def verify_grant(self, token: str) -> Optional[dict]:
+        """Claims of a valid, unexpired upload grant"""
+        payload = verify_token(token)
+        if not payload or payload.get("typ") != GRANT_TYPE:
+            return None
+        return payload
+
+    async def create_upload(self, record_id: str, user_id: str, upload_data: DirectUploadCreate) -> DirectUpload:
+        """Issue a short-lived upload target for a new object under the record's folder"""
+        if upload_data.size is not None and upload_data.size > settings.direct_upload_max_bytes:
+            raise DirectUploadError(f"File exceeds the {settings.direct_upload_max_bytes} byte limit")
+
+        storage_path = f"users/{user_id}/records/{record_id}/{build_audio_filename(record_id, upload_data.filename)}"
+        expires_delta = timedelta(seconds=settings.direct_upload_ttl_seconds)
+        grant = self.create_grant(record_id, user_id, storage_path, expires_delta)
+        upload_url = await storage_service.create_upload_url(storage_path, grant)
+
+        return DirectUpload(
+            upload_url=upload_url,
+            headers={"content-type": upload_data.content_type},
+            storage_path=storage_path,
+            upload_token=grant,
+            expires_at=datetime.now(timezone.utc) + expires_delta
+        )
+
+    async def finalize_upload(self, record_id: str, user_id: str, upload_token: str) -> Optional[Record]:
+        """Check the uploaded object, read its headers by range requests and update the record"""
+        grant = self.verify_grant(upload_token)
+        if not grant or grant["uid"] != user_id or grant["rid"] != record_id:
+            raise DirectUploadError("Invalid or expired upload token")
+        storage_path = grant["path"]
+
+        probe = AudioProbe()
+        head = await storage_service.read_object_range(storage_path, f"bytes=0-{probe.head_size - 1}")
+        if head is None:
+            raise DirectUploadError("Uploaded file not found")
+        head_bytes, total = head
+
+        tail_bytes = head_bytes
+        if total > len(head_bytes):
+            tail = await storage_service.read_object_range(storage_path, f"bytes=-{probe.tail_size}")
+            tail_bytes = tail[0] if tail else b""
+
+        metadata = probe.probe_ranges(head_bytes, tail_bytes, total)
+        print(f"📊 Finalizing direct upload {storage_path} ({total} bytes)")
+        return await record_service.attach_uploaded_audio(record_id, user_id, storage_service.public_url(storage_path), metadata, total)
+
+
+# Service instance
+direct_upload_service = DirectUploadService()
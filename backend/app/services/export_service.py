@@ -0,0 +1,143 @@
+from collections import deque
+from typing import AsyncIterator, List, Tuple
+from app.core.config import settings
+from app.services.record_service import record_service
+from app.services.storage_service import storage_service
+import asyncio
+import json
+import os
+import zipfile
+
+
+MANIFEST_NAME = "manifest.jsonl"
+ERRORS_NAME = "errors.jsonl"
+
+
+class _ZipSink:
+    """Write-only file object for zipfile; what it writes is drained into the response.
+
+    Having no seek() or tell(), it makes zipfile write data descriptors after
+    each entry instead of going back to patch sizes into the local headers.
+    """
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def write(self, data: bytes) -> int:
+        self.buffer += data
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = bytes(self.buffer)
+        self.buffer.clear()
+        return data
+
+
+class ExportService:
+    """Stream a user's recordings and metadata as a ZIP archive generated on the fly"""
+
+    def _audio_entry_name(self, record_id: str, storage_path: str) -> str:
+        return f"audio/{record_id}{os.path.splitext(storage_path)[1]}"
+
+    async def _fetch(self, storage_path: str, queue: asyncio.Queue):
+        """Pump one object into a bounded queue; None marks the end, an exception a failure"""
+        try:
+            async for chunk in storage_service.download_object_stream(storage_path):
+                await queue.put(chunk)
+            await queue.put(None)
+        except Exception as e:
+            await queue.put(e)
+
+    async def export_archive(self, user_id: str) -> AsyncIterator[bytes]:
+        """Yield a ZIP of manifest.jsonl plus every audio file, in bounded memory.
+
+        The manifest is written first, page by page, while only the
+        (record_id, storage_path, date) of records with audio are kept. Audio is
+        then fetched EXPORT_CONCURRENCY objects ahead of the one being written,
+        each through a queue of at most EXPORT_QUEUE_CHUNKS chunks, counting the
+        one being written.
+        """
+        sink = _ZipSink()
+        archive = zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_STORED, allowZip64=True)
+        audio_items: List[Tuple[str, str, tuple]] = []
+
+        with archive.open(MANIFEST_NAME, mode="w", force_zip64=True) as manifest:
+            async for record in record_service.iter_records(user_id):
+                # Same ownership check as streaming: audio_file_path is client-writable
+                storage_path = (
+                    storage_service.record_object_path(record.audio_file_path, user_id, record.id, record.audio_digest)
+                    if record.audio_file_path else None
+                )
+                entry = record.model_dump(mode="json")
+                entry["audio"] = self._audio_entry_name(record.id, storage_path) if storage_path else None
+                manifest.write((json.dumps(entry) + "\n").encode("utf-8"))
+                if storage_path:
+                    # ZIP timestamps cannot go before 1980
+                    date_time = max(record.created_at.timetuple()[:6], (1980, 1, 1, 0, 0, 0))
+                    audio_items.append((record.id, storage_path, date_time))
+                if len(sink.buffer) >= settings.upload_chunk_size:
+                    yield sink.drain()
+        if sink.buffer:
+            yield sink.drain()
+
+        errors = []
+        pending = deque()
+        items = iter(audio_items)
+
+        def start_next():
+            item = next(items, None)
+            if item is not None:
+                queue = asyncio.Queue(maxsize=settings.export_queue_chunks)
+                pending.append((item, queue, asyncio.create_task(self._fetch(item[1], queue))))
+
+        try:
+            for _ in range(settings.export_concurrency):
+                start_next()
+
+            while pending:
+                # Stays in pending while it is written, so a disconnect cancels it too
+                (record_id, storage_path, date_time), queue, _ = pending[0]
+
+                info = zipfile.ZipInfo(self._audio_entry_name(record_id, storage_path), date_time)
+                entry = None
+                try:
+                    while True:
+                        chunk = await queue.get()
+                        if chunk is None:
+                            break
+                        if isinstance(chunk, Exception):
+                            raise chunk
+                        # The entry is only started once data arrives, so a missing object leaves no stub
+                        if entry is None:
+                            entry = archive.open(info, mode="w", force_zip64=True)
+                        entry.write(chunk)
+                        if len(sink.buffer) >= settings.upload_chunk_size:
+                            yield sink.drain()
+                    if entry is None:
+                        archive.writestr(info, b"")
+                except Exception as e:
+                    print(f"❌ Export of {storage_path} failed: {e}")
+                    errors.append({"id": record_id, "audio": info.filename, "error": str(e), "truncated": entry is not None})
+                finally:
+                    if entry is not None:
+                        entry.close()
+                pending.popleft()
+                start_next()
+                if sink.buffer:
+                    yield sink.drain()
+        finally:
+            # Also runs when the client disconnects and the generator is closed
+            for _, _, task in pending:
+                task.cancel()
+
+        if errors:
+            archive.writestr(ERRORS_NAME, "".join(json.dumps(error) + "\n" for error in errors))
+        archive.close()
+        yield sink.drain()
+
+
+# Service instance
+export_service = ExportService()
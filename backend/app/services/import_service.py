@@ -0,0 +1,148 @@
+from typing import Iterator, List, Optional, Tuple, Union
+from pydantic import ValidationError
+from app.core.config import settings
+from app.core.database import run_blocking
+from app.models.record import RecordCreate, RecordImportError, RecordImportResponse
+from app.services.record_service import record_service
+import asyncio
+import csv
+import itertools
+import json
+import os
+
+
+IMPORT_FIELDS = ("title", "script", "description")
+IMPORT_FORMATS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl"}
+
+
+class ImportFormatError(Exception):
+    """Raised when an import file cannot be read as a whole"""
+
+
+def format_validation_error(error: ValidationError) -> str:
+    """One line per failed field, e.g. 'title: Field required'"""
+    return "; ".join(
+        f"{'.'.join(str(part) for part in detail['loc']) or 'item'}: {detail['msg']}"
+        for detail in error.errors()
+    )
+
+
+def detect_format(filename: Optional[str], content_type: Optional[str] = None) -> str:
+    """Pick "csv" or "jsonl" from the file extension, falling back to the content type"""
+    extension = os.path.splitext(filename or "")[1].lower()
+    if extension in IMPORT_FORMATS:
+        return IMPORT_FORMATS[extension]
+    if content_type and "csv" in content_type:
+        return "csv"
+    if content_type and ("jsonl" in content_type or "ndjson" in content_type):
+        return "jsonl"
+    raise ImportFormatError("File must be .csv or .jsonl")
+
+
+class _RowReader:
+    """Read and validate an import file a batch at a time; every call runs on the I/O thread pool"""
+
+    def __init__(self, path: str, file_format: str):
+        # utf-8-sig drops the byte order mark spreadsheet exports often start with
+        self.file = open(path, "r", encoding="utf-8-sig", newline="")
+        self.rows = self._csv_rows() if file_format == "csv" else self._jsonl_rows()
+        self.line = 0
+
+    def _csv_rows(self) -> Iterator[Tuple[int, Union[dict, str]]]:
+        reader = csv.DictReader(self.file)
+        missing = [field for field in ("title", "script") if field not in (reader.fieldnames or [])]
+        if missing:
+            raise ImportFormatError(f"CSV header is missing column(s): {', '.join(missing)}")
+        for row in reader:
+            item = {field: row[field] for field in IMPORT_FIELDS if row.get(field) is not None}
+            if item.get("description") == "":
+                item["description"] = None
+            yield reader.line_num, item
+
+    def _jsonl_rows(self) -> Iterator[Tuple[int, Union[dict, str]]]:
+        for number, line in enumerate(self.file, 1):
+            if not line.strip():
+                continue
+            try:
+                item = json.loads(line)
+            except ValueError as e:
+                yield number, f"Invalid JSON: {e}"
+                continue
+            if not isinstance(item, dict):
+                yield number, "Each line must be a JSON object"
+                continue
+            yield number, {field: item[field] for field in IMPORT_FIELDS if field in item}
+
+    def read_batch(self, size: int) -> List[Tuple[int, Optional[RecordCreate], Optional[str]]]:
+        """Up to size (line, record, error) rows; an empty list means the file is done"""
+        batch = []
+        try:
+            for line, item in itertools.islice(self.rows, size):
+                self.line = line
+                if isinstance(item, str):
+                    batch.append((line, None, item))
+                    continue
+                try:
+                    batch.append((line, RecordCreate.model_validate(item), None))
+                except ValidationError as e:
+                    batch.append((line, None, format_validation_error(e)))
+        except (UnicodeDecodeError, csv.Error) as e:
+            if self.line == 0 and not batch:
+                raise ImportFormatError(f"File could not be read: {e}")
+            # The generator is finished after raising, so this ends the import
+            batch.append((self.line + 1, None, f"Unreadable from here on: {e}"))
+        return batch
+
+    def close(self):
+        self.file.close()
+
+
+class ImportService:
+    """Create records from CSV or JSONL files of title/script/description rows.
+
+    Parsing and validation run on the I/O thread pool one insert chunk at a
+    time, overlapping with the insert of the previous chunk, so memory stays
+    flat however long the file is.
+    """
+
+    async def import_file(self, path: str, file_format: str, user_id: str) -> RecordImportResponse:
+        """Import a file on local disk for the user, reporting failed rows by line"""
+        reader = await run_blocking(_RowReader, path, file_format)
+        report = RecordImportResponse(created=0, invalid=0, failed=0, errors=[])
+        batch_size = settings.record_insert_chunk_size
+        next_batch = asyncio.ensure_future(run_blocking(reader.read_batch, batch_size))
+        try:
+            while True:
+                batch = await next_batch
+                if not batch:
+                    break
+                next_batch = asyncio.ensure_future(run_blocking(reader.read_batch, batch_size))
+
+                created = iter(await record_service.create_records([record for _, record, _ in batch if record], user_id))
+                for line, record, error in batch:
+                    if record is None:
+                        report.invalid += 1
+                    elif next(created):
+                        report.created += 1
+                        continue
+                    else:
+                        report.failed += 1
+                        error = "Failed to store record"
+                    self._add_error(report, line, error)
+        finally:
+            # A read may still be running when the import is cut short
+            if next_batch.done():
+                reader.close()
+            else:
+                next_batch.add_done_callback(lambda _: reader.close())
+        return report
+
+    def _add_error(self, report: RecordImportResponse, line: int, error: str):
+        if len(report.errors) < settings.import_max_errors:
+            report.errors.append(RecordImportError(line=line, error=error))
+        else:
+            report.errors_truncated = True
+
+
+# Service instance
+import_service = ImportService()
@@ -0,0 +1,225 @@
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
+from app.core.config import settings
+from app.core.database import get_service_db, execute
+from app.models.upload_session import UploadSession
+from app.services.record_service import is_uuid
+from app.services.storage_backends import StorageEntry
+from app.services.storage_service import storage_service
+from app.services.waveform_service import WAVEFORM_FILENAME
+from supabase import Client
+import asyncio
+import json
+import os
+
+
+# Supabase keeps these in otherwise empty folders created from the dashboard
+PLACEHOLDER_NAMES = {".emptyFolderPlaceholder"}
+
+
+@dataclass
+class ReconcileReport:
+    prefixes_scanned: int = 0
+    objects_scanned: int = 0
+    orphans_found: int = 0
+    orphans_deleted: int = 0
+    orphan_bytes: int = 0
+    complete: bool = False  # the whole bucket was covered and the checkpoint reset
+
+
+class ReconcileService:
+    """Find and remove storage objects that no database row points at.
+
+    The bucket is walked one user (and one blob shard) at a time. After each
+    prefix the position is written to a checkpoint, so a large bucket can be
+    covered over several bounded runs.
+    """
+
+    def __init__(self):
+        self.db: Client = get_service_db()  # Reads every user's rows
+
+    async def _iter_entries(self, prefix: str) -> AsyncIterator[StorageEntry]:
+        """Every entry directly under a prefix, one listing page at a time"""
+        offset = 0
+        while True:
+            page = await storage_service.list_objects(prefix, settings.reconcile_page_size, offset)
+            for entry in page:
+                if entry.name not in PLACEHOLDER_NAMES:
+                    yield entry
+            if len(page) < settings.reconcile_page_size:
+                return
+            offset += len(page)
+
+    async def _walk_files(self, prefix: str) -> List[Tuple[str, StorageEntry]]:
+        """All files below a prefix, descending into folders"""
+        files = []
+        async for entry in self._iter_entries(prefix):
+            path = f"{prefix}/{entry.name}"
+            if entry.is_folder:
+                files.extend(await self._walk_files(path))
+            else:
+                files.append((path, entry))
+        return files
+
+    def _load_checkpoint(self, checkpoint_path: Optional[str]) -> dict:
+        if checkpoint_path and os.path.exists(checkpoint_path):
+            with open(checkpoint_path) as f:
+                return json.load(f)
+        return {"phase": "users", "after": ""}
+
+    def _save_checkpoint(self, checkpoint_path: Optional[str], checkpoint: dict):
+        if not checkpoint_path:
+            return
+        temp_path = f"{checkpoint_path}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(checkpoint, f)
+        os.replace(temp_path, checkpoint_path)
+
+    async def run(
+        self,
+        dry_run: bool = False,
+        checkpoint_path: Optional[str] = None,
+        grace_hours: Optional[float] = None,
+        concurrency: Optional[int] = None,
+        max_prefixes: Optional[int] = None
+    ) -> ReconcileReport:
+        """Reconcile from the checkpoint onward, stopping after max_prefixes prefixes"""
+        report = ReconcileReport()
+        checkpoint = self._load_checkpoint(checkpoint_path)
+        grace = timedelta(hours=settings.reconcile_grace_hours if grace_hours is None else grace_hours)
+        cutoff = datetime.now(timezone.utc) - grace
+        semaphore = asyncio.Semaphore(concurrency or settings.reconcile_concurrency)
+
+        phases = [
+            ("users", "users", is_uuid, self._reconcile_user),
+            ("blobs", "blobs/sha256", lambda name: len(name) == 2, self._reconcile_blob_shard),
+        ]
+        start = [phase[0] for phase in phases].index(checkpoint["phase"])
+        for name, root, accepts, reconcile in phases[start:]:
+            # Listed in full before anything is deleted: a folder emptied by the removals
+            # drops out of the listing and would shift later offset-based pages past an entry
+            prefixes = [
+                entry.name async for entry in self._iter_entries(root)
+                # Anything that is not a shard or user folder was not written by us; leave it alone
+                if entry.is_folder and entry.name > checkpoint["after"] and accepts(entry.name)
+            ]
+            for prefix in prefixes:
+                if max_prefixes is not None and report.prefixes_scanned >= max_prefixes:
+                    return report
+
+                orphans = await reconcile(prefix, cutoff, semaphore, report)
+                await self._remove_orphans(orphans, dry_run, report)
+                report.prefixes_scanned += 1
+                checkpoint = {"phase": name, "after": prefix}
+                self._save_checkpoint(checkpoint_path, checkpoint)
+            checkpoint = {"phase": name, "after": ""}
+
+        # A full pass is done; the next run starts from the top again
+        self._save_checkpoint(checkpoint_path, {"phase": "users", "after": ""})
+        report.complete = True
+        return report
+
+    async def _remove_orphans(self, orphans: List[Tuple[str, StorageEntry]], dry_run: bool, report: ReconcileReport):
+        report.orphans_found += len(orphans)
+        report.orphan_bytes += sum(entry.size or 0 for _, entry in orphans)
+        for path, _ in orphans:
+            print(f"🗑️  Orphan: {path}")
+        if dry_run or not orphans:
+            return
+        # remove_objects already splits into per-call batches
+        if await storage_service.remove_objects([path for path, _ in orphans]):
+            report.orphans_deleted += len(orphans)
+        else:
+            print(f"❌ Could not remove some of {len(orphans)} orphans")
+
+    def _is_stale(self, entry: StorageEntry, cutoff: datetime) -> bool:
+        """Objects without a timestamp or newer than the grace period may still be in flight"""
+        return entry.updated_at is not None and entry.updated_at < cutoff
+
+    async def _reconcile_user(self, user_id: str, cutoff: datetime, semaphore: asyncio.Semaphore, report: ReconcileReport) -> List[Tuple[str, StorageEntry]]:
+        """Orphans under users/{user_id}/records"""
+        records_prefix = f"users/{user_id}/records"
+        record_ids = [entry.name async for entry in self._iter_entries(records_prefix) if entry.is_folder and is_uuid(entry.name)]
+
+        orphans = []
+        for start in range(0, len(record_ids), settings.reconcile_batch_size):
+            batch = record_ids[start:start + settings.reconcile_batch_size]
+            referenced, kept_prefixes = await self._referenced_paths(user_id, batch)
+
+            async def walk(record_id: str) -> List[Tuple[str, StorageEntry]]:
+                async with semaphore:
+                    return await self._walk_files(f"{records_prefix}/{record_id}")
+
+            for files in await asyncio.gather(*(walk(record_id) for record_id in batch)):
+                report.objects_scanned += len(files)
+                for path, entry in files:
+                    if path in referenced or any(path.startswith(prefix) for prefix in kept_prefixes):
+                        continue
+                    if self._is_stale(entry, cutoff):
+                        orphans.append((path, entry))
+        return orphans
+
+    async def _referenced_paths(self, user_id: str, record_ids: List[str]) -> Tuple[Set[str], Set[str]]:
+        """Storage paths the user's rows point at, and prefixes to keep whole.
+
+        Kept prefixes are sessions still accepting chunks, and the folders of records
+        whose audio URL cannot be mapped to a path (legacy URLs, or a changed
+        LOCAL_STORAGE_BASE_URL): what such a record points at is unknown, so none
+        of its files count as orphans.
+        """
+        records = await execute(
+            self.db.table("records")
+            .select("id, user_id, audio_file_path, original_audio_file_path")
+            .in_("id", record_ids)
+            .eq("user_id", user_id)
+        )
+        referenced = set()
+        kept_prefixes = set()
+        for row in records.data:
+            for audio_url in (row["audio_file_path"], row.get("original_audio_file_path")):
+                if not audio_url:
+                    continue
+                storage_path = storage_service.path_from_url(audio_url)
+                if storage_path:
+                    referenced.add(storage_path)
+                else:
+                    kept_prefixes.add(f"users/{user_id}/records/{row['id']}/")
+            if row["audio_file_path"]:
+                referenced.add(f"users/{user_id}/records/{row['id']}/{WAVEFORM_FILENAME}")
+
+        sessions = await execute(
+            self.db.table("upload_sessions")
+            .select("*")
+            .in_("record_id", record_ids)
+            .eq("user_id", user_id)
+            .eq("status", "open")
+        )
+        now = datetime.now(timezone.utc)
+        for row in sessions.data:
+            session = UploadSession(**row)
+            if session.expires_at > now:
+                kept_prefixes.add(f"users/{user_id}/records/{session.record_id}/sessions/{session.id}/")
+        return referenced, kept_prefixes
+
+    async def _reconcile_blob_shard(self, shard: str, cutoff: datetime, semaphore: asyncio.Semaphore, report: ReconcileReport) -> List[Tuple[str, StorageEntry]]:
+        """Orphans under blobs/sha256/{shard}: objects with no audio_blobs row"""
+        async with semaphore:
+            files = await self._walk_files(f"blobs/sha256/{shard}")
+        report.objects_scanned += len(files)
+
+        known: Dict[str, str] = {}
+        paths = [path for path, _ in files]
+        for start in range(0, len(paths), settings.reconcile_batch_size):
+            result = await execute(
+                self.db.table("audio_blobs")
+                .select("digest, storage_path")
+                .in_("storage_path", paths[start:start + settings.reconcile_batch_size])
+            )
+            known.update({row["storage_path"]: row["digest"] for row in result.data})
+
+        return [(path, entry) for path, entry in files if path not in known and self._is_stale(entry, cutoff)]
+
+
+# Service instance
+reconcile_service = ReconcileService()
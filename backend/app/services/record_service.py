@@ -1,14 +1,58 @@
-from typing import Optional, List
-from app.core.database import get_db
-from app.models.record import RecordCreate, RecordUpdate, Record
+from typing import AsyncIterator, Optional, List, Tuple
+from app.core.database import get_db, execute, run_blocking
+from app.models.record import RecordCreate, RecordUpdate, Record, RecordPage, RecordSummary, RecordSummaryPage, RecordSearchResult, RecordSearchPage, RecordStats, RecordBulkDeleteResult
 from app.services.storage_service import storage_service
+from app.services.transcode_service import transcode_service
+from app.services.audio_probe import AudioProbe, AudioMetadata
+from app.services.waveform_service import waveform_service, WAVEFORM_FILENAME
+from app.services.blob_service import blob_service
+from app.core.config import settings
+from app.core.pagination import encode_cursor, decode_cursor, InvalidCursor
+from app.core.cache import TTLCache
+from app.core.streaming import spool_to_file, iter_file, remove_quietly, ByteCounter, StreamDigest
 from supabase import Client
+from pydantic import TypeAdapter
+from dataclasses import asdict
+from datetime import datetime
+import itertools
 import os
+import uuid
+
+
+
+# Columns behind Record; the generated search and preview columns are never sent
+RECORD_COLUMNS = (
+    "id, user_id, title, script, description, audio_file_path, original_audio_file_path, audio_digest, "
+    "duration, sample_rate, channels, codec, audio_size, created_at, updated_at"
+)
+
+# Columns behind RecordSummary; script_preview and script_length are generated columns
+SUMMARY_COLUMNS = "id, user_id, title, script_preview, script_length, audio_file_path, duration, created_at, updated_at"
+
+
+_timestamp = TypeAdapter(datetime)
+
+
+def _parse_timestamp(value: str) -> datetime:
+    return _timestamp.validate_python(value)
+
+
+def is_uuid(value: str) -> bool:
+    try:
+        uuid.UUID(value)
+        return True
+    except ValueError:
+        return False
 
 
 class RecordService:
     def __init__(self):
         self.db: Client = get_db()
+        # Records and listing pages; other processes' writes show up once entries expire
+        self.cache = TTLCache(settings.record_cache_size, settings.record_cache_ttl_seconds)
+        self.user_versions = TTLCache(settings.record_cache_size, settings.record_cache_ttl_seconds)
+        self.version_counter = itertools.count(1)
+        self.record_fetches: dict = {}  # record key -> token of the latest uncached read in flight
     
     async def create_record(self, record_data: RecordCreate, user_id: str) -> Record:
         """Create a new record"""
@@ -17,52 +61,302 @@ class RecordService:
         record_dict["created_at"] = "now()"
         record_dict["updated_at"] = "now()"
         
-        result = self.db.table("records").insert(record_dict).execute()
-        return Record(**result.data[0])
+        result = await execute(self.db.table("records").insert(record_dict))
+        return self._cache_record(Record(**result.data[0]))
+    
+    async def create_records(self, records: List[RecordCreate], user_id: str) -> List[Optional[Record]]:
+        """Create many records with multi-row inserts; None marks items whose chunk failed"""
+        created: List[Optional[Record]] = []
+        chunk_size = settings.record_insert_chunk_size
+        for start in range(0, len(records), chunk_size):
+            chunk = records[start:start + chunk_size]
+            rows = [
+                {**record.model_dump(), "user_id": user_id, "created_at": "now()", "updated_at": "now()"}
+                for record in chunk
+            ]
+            try:
+                result = await execute(self.db.table("records").insert(rows))
+                # Rows come back in insert order
+                created.extend(Record(**row) for row in result.data)
+            except Exception as e:
+                # One bad row fails the whole statement; retry singly so only that row is reported
+                print(f"Error inserting records {start}-{start + len(chunk) - 1}, retrying one by one: {e}")
+                for index, row in enumerate(rows, start):
+                    try:
+                        result = await execute(self.db.table("records").insert(row))
+                        created.append(Record(**result.data[0]))
+                    except Exception as e:
+                        print(f"Error inserting record {index}: {e}")
+                        created.append(None)
+        
+        if records:
+            self._bump_user_version(user_id)
+        return created
+    
+    async def get_records_by_user(self, user_id: str, limit: int, cursor: Optional[str] = None) -> RecordPage:
+        """Get one page of a user's records, newest first"""
+        key = ("page", user_id, self._user_version(user_id), "full", limit, cursor)
+        page = self.cache.get(key)
+        if page is None:
+            rows, next_cursor = await self._records_page(user_id, limit, cursor, RECORD_COLUMNS)
+            page = RecordPage(items=[Record(**record) for record in rows], next_cursor=next_cursor)
+            self.cache.set(key, page)
+        return page
+    
+    async def get_record_summaries_by_user(self, user_id: str, limit: int, cursor: Optional[str] = None) -> RecordSummaryPage:
+        """Get one page of a user's records without the script and description bodies"""
+        key = ("page", user_id, self._user_version(user_id), "summary", limit, cursor)
+        page = self.cache.get(key)
+        if page is None:
+            rows, next_cursor = await self._records_page(user_id, limit, cursor, SUMMARY_COLUMNS)
+            page = RecordSummaryPage(items=[RecordSummary(**record) for record in rows], next_cursor=next_cursor)
+            self.cache.set(key, page)
+        return page
+    
+    async def iter_records(self, user_id: str, page_size: int = 200) -> AsyncIterator[Record]:
+        """Every record of a user, newest first, read page by page and bypassing the cache"""
+        cursor = None
+        while True:
+            rows, cursor = await self._records_page(user_id, page_size, cursor, RECORD_COLUMNS)
+            for row in rows:
+                yield Record(**row)
+            if cursor is None:
+                return
+    
+    async def search_records(self, user_id: str, query: str, limit: int, cursor: Optional[str] = None) -> RecordSearchPage:
+        """Full-text search over a user's titles, descriptions and scripts, best match first"""
+        position = decode_cursor(cursor)
+        params = {"p_user_id": user_id, "p_query": query, "p_limit": limit + 1}
+        if position:
+            if not is_uuid(str(position.get("id"))) or not isinstance(position.get("rank"), (int, float)):
+                raise InvalidCursor("Invalid cursor")
+            params["p_after_rank"] = position["rank"]
+            params["p_after_id"] = position["id"]
+        
+        result = await execute(self.db.rpc("search_records", params))
+        rows = result.data[:limit]
+        
+        next_cursor = None
+        if len(result.data) > limit:
+            next_cursor = encode_cursor({"rank": rows[-1]["rank"], "id": rows[-1]["id"]})
+        return RecordSearchPage(items=[RecordSearchResult(**row) for row in rows], next_cursor=next_cursor)
     
-    async def get_records_by_user(self, user_id: str) -> List[Record]:
-        """Get all records for a user"""
-        result = self.db.table("records").select("*").eq("user_id", user_id).order("created_at", desc=True).execute()
-        return [Record(**record) for record in result.data]
+    async def _records_page(self, user_id: str, limit: int, cursor: Optional[str], columns: str) -> Tuple[List[dict], Optional[str]]:
+        """Rows of one page and the cursor of the next.
+        
+        Pages are keyed on (created_at, id) rather than offsets, so each page is
+        an index range scan on (user_id, created_at DESC, id DESC) however deep it is.
+        """
+        position = decode_cursor(cursor)
+        query = self.db.table("records").select(columns).eq("user_id", user_id)
+        if position:
+            if not is_uuid(str(position.get("id"))) or not isinstance(position.get("created_at"), str):
+                raise InvalidCursor("Invalid cursor")
+            # Re-serialized from the parsed value, never interpolated as sent
+            try:
+                created_at = _parse_timestamp(position["created_at"]).isoformat()
+            except ValueError:
+                raise InvalidCursor("Invalid cursor")
+            query = query.or_(f'created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt.{position["id"]})')
+        
+        # One extra row tells us whether another page exists
+        result = await execute(query.order("created_at", desc=True).order("id", desc=True).limit(limit + 1))
+        rows = result.data[:limit]
+        
+        next_cursor = None
+        if len(result.data) > limit:
+            # The raw column value keeps full precision for the next comparison
+            next_cursor = encode_cursor({"created_at": rows[-1]["created_at"], "id": rows[-1]["id"]})
+        return rows, next_cursor
     
     async def get_record_by_id(self, record_id: str, user_id: str) -> Optional[Record]:
-        """Get a specific record by ID"""
-        result = self.db.table("records").select("*").eq("id", record_id).eq("user_id", user_id).execute()
+        """Get a specific record by ID, from the cache when it was read or written recently"""
+        key = ("record", user_id, record_id)
+        record = self.cache.get(key)
+        if record is None:
+            token = self.record_fetches[key] = object()
+            try:
+                record = await self._fetch_record(record_id, user_id)
+            finally:
+                # A write or delete during the read drops the token, and the row read may predate it
+                current = self.record_fetches.get(key) is token
+                if current:
+                    del self.record_fetches[key]
+            if record and current:
+                self.cache.set(key, record)
+        return record
+    
+    async def get_record_version(self, record_id: str, user_id: str) -> Optional[datetime]:
+        """updated_at of a record without reading its body, or None if it does not exist"""
+        record = self.cache.get(("record", user_id, record_id))
+        if record is not None:
+            return record.updated_at
+        result = await execute(self.db.table("records").select("updated_at").eq("id", record_id).eq("user_id", user_id))
+        if result.data:
+            return _parse_timestamp(result.data[0]["updated_at"])
+        return None
+    
+    async def get_records_version(self, user_id: str) -> Tuple[Optional[datetime], int]:
+        """(latest updated_at, row count) of a user's records: changes whenever any listing would.
+        
+        Inserts and updates move the latest updated_at, deletes move the count. Both come
+        from one index-backed query on (user_id, updated_at DESC).
+        """
+        key = ("version", user_id, self._user_version(user_id))
+        version = self.cache.get(key)
+        if version is None:
+            result = await execute(
+                self.db.table("records")
+                .select("updated_at", count="exact")
+                .eq("user_id", user_id)
+                .order("updated_at", desc=True)
+                .limit(1)
+            )
+            latest = _parse_timestamp(result.data[0]["updated_at"]) if result.data else None
+            version = (latest, result.count or 0)
+            self.cache.set(key, version)
+        return version
+    
+    async def get_record_stats(self, user_id: str) -> RecordStats:
+        """Record count, audio count, total duration and total audio bytes, read from one row"""
+        key = ("stats", user_id, self._user_version(user_id))
+        stats = self.cache.get(key)
+        if stats is None:
+            result = await execute(self.db.table("user_record_stats").select("*").eq("user_id", user_id))
+            # Users who never created a record have no row yet
+            stats = RecordStats(**result.data[0]) if result.data else RecordStats()
+            self.cache.set(key, stats)
+        return stats
+    
+    async def _fetch_record(self, record_id: str, user_id: str) -> Optional[Record]:
+        """Read a record from the database, bypassing the cache"""
+        result = await execute(self.db.table("records").select(RECORD_COLUMNS).eq("id", record_id).eq("user_id", user_id))
         if result.data:
             return Record(**result.data[0])
         return None
     
+    def _cache_record(self, record: Record) -> Record:
+        """Write a freshly stored record through to the cache and drop its owner's cached pages"""
+        self.cache.set(("record", record.user_id, record.id), record)
+        self.record_fetches.pop(("record", record.user_id, record.id), None)
+        self._bump_user_version(record.user_id)
+        return record
+    
+    def _forget_records(self, user_id: str, record_ids: List[str]):
+        """Drop deleted records and their owner's cached pages"""
+        for record_id in record_ids:
+            self.cache.delete(("record", user_id, record_id))
+            self.record_fetches.pop(("record", user_id, record_id), None)
+        self._bump_user_version(user_id)
+    
+    def _user_version(self, user_id: str) -> int:
+        """Version stamped into a user's page keys; a user seen for the first time gets a fresh one"""
+        version = self.user_versions.get(user_id)
+        if version is None:
+            version = self._bump_user_version(user_id)
+        return version
+    
+    def _bump_user_version(self, user_id: str) -> int:
+        # Versions come from one global counter, so a forgotten user never gets an old number back
+        version = next(self.version_counter)
+        self.user_versions.set(user_id, version)
+        return version
+    
+    def cache_stats(self) -> dict:
+        return self.cache.stats()
+    
     async def update_record(self, record_id: str, user_id: str, record_data: RecordUpdate) -> Optional[Record]:
         """Update a record"""
         update_data = {k: v for k, v in record_data.model_dump().items() if v is not None}
         update_data["updated_at"] = "now()"
         
-        result = self.db.table("records").update(update_data).eq("id", record_id).eq("user_id", user_id).execute()
+        result = await execute(self.db.table("records").update(update_data).eq("id", record_id).eq("user_id", user_id))
         if result.data:
-            return Record(**result.data[0])
+            return self._cache_record(Record(**result.data[0]))
         return None
     
     async def delete_record(self, record_id: str, user_id: str) -> bool:
         """Delete a record and its associated audio file"""
         try:
-            # Get record to check if it has audio file
-            record = await self.get_record_by_id(record_id, user_id)
-            if record and record.audio_file_path:
-                # Extract filename from the storage URL
-                # URL format: https://xxx.supabase.co/storage/v1/object/public/audio-recordings/users/xxx/records/xxx/filename.wav
-                url_parts = record.audio_file_path.split('/')
-                if len(url_parts) >= 2:
-                    filename = url_parts[-1]
-                    # Delete from storage
-                    await storage_service.delete_audio_file(user_id, record_id, filename)
+            # Get record to check if it has audio file (never from the cache: a stale digest would release the wrong blob)
+            record = await self._fetch_record(record_id, user_id)
+            if record:
+                for audio_url in (record.audio_file_path, record.original_audio_file_path):
+                    if not audio_url or (record.audio_digest and audio_url == record.audio_file_path):
+                        # Shared blobs are removed by reference count once the row is gone
+                        continue
+                    # Extract filename from the storage URL
+                    # URL format: https://xxx.supabase.co/storage/v1/object/public/audio-recordings/users/xxx/records/xxx/filename.wav
+                    url_parts = audio_url.split('/')
+                    if len(url_parts) >= 2:
+                        filename = url_parts[-1]
+                        # Delete from storage
+                        await storage_service.delete_audio_file(user_id, record_id, filename)
+                if record.audio_file_path and settings.waveform_enabled:
+                    await storage_service.delete_audio_file(user_id, record_id, WAVEFORM_FILENAME)
             
             # Delete from database
-            result = self.db.table("records").delete().eq("id", record_id).eq("user_id", user_id).execute()
-            return len(result.data) > 0
+            result = await execute(self.db.table("records").delete().eq("id", record_id).eq("user_id", user_id))
+            deleted = len(result.data) > 0
+            self._forget_records(user_id, [record_id])
+            if deleted and record and record.audio_digest:
+                await blob_service.release(record.audio_digest)
+            return deleted
         except Exception as e:
             print(f"Error deleting record: {e}")
             return False
     
+    async def delete_records(self, record_ids: List[str], user_id: str) -> List[RecordBulkDeleteResult]:
+        """Delete many records with one lookup, one batched storage removal and one delete"""
+        unique_ids = list(dict.fromkeys(record_ids))
+        valid_ids = [record_id for record_id in unique_ids if is_uuid(record_id)]
+        
+        owned = {}
+        if valid_ids:
+            result = await execute(
+                self.db.table("records")
+                .select("id, audio_file_path, original_audio_file_path, audio_digest")
+                .in_("id", valid_ids)
+                .eq("user_id", user_id)
+            )
+            owned = {row["id"]: row for row in result.data}
+        
+        statuses = {record_id: "not_found" for record_id in unique_ids}
+        if owned:
+            storage_paths = []
+            for row in owned.values():
+                for audio_url in (row["audio_file_path"], row.get("original_audio_file_path")):
+                    if not audio_url:
+                        continue
+                    # Only the record's own folder; clients can set audio_file_path, and shared
+                    # blobs go through release_many below
+                    storage_path = storage_service.record_object_path(audio_url, user_id, row["id"])
+                    if storage_path:
+                        storage_paths.append(storage_path)
+                if row["audio_file_path"] and settings.waveform_enabled:
+                    storage_paths.append(f"users/{user_id}/records/{row['id']}/{WAVEFORM_FILENAME}")
+            
+            # Like delete_record, a storage failure leaves an orphan object rather than blocking the delete
+            if not await storage_service.remove_objects(storage_paths):
+                print(f"⚠️  Some of {len(storage_paths)} storage objects could not be removed")
+            
+            try:
+                deleted = await execute(self.db.table("records").delete().in_("id", list(owned)).eq("user_id", user_id))
+            except Exception as e:
+                print(f"Error deleting records: {e}")
+                for record_id in owned:
+                    statuses[record_id] = "error"
+            else:
+                deleted_ids = {row["id"] for row in deleted.data}
+                self._forget_records(user_id, list(deleted_ids))
+                for record_id in owned:
+                    statuses[record_id] = "deleted" if record_id in deleted_ids else "error"
+                await blob_service.release_many([
+                    owned[record_id]["audio_digest"] for record_id in deleted_ids if owned[record_id].get("audio_digest")
+                ])
+        
+        return [RecordBulkDeleteResult(id=record_id, status=statuses[record_id]) for record_id in unique_ids]
+    
     async def update_audio_file(self, record_id: str, user_id: str, audio_file_path: str, duration: float = None) -> Optional[Record]:
         """Update record with audio file information using Supabase Storage"""
         try:
@@ -72,14 +366,15 @@ class RecordService:
             if storage_url:
                 update_data = {
                     "audio_file_path": storage_url,
+                    "audio_size": os.path.getsize(audio_file_path),
                     "updated_at": "now()"
                 }
                 if duration:
                     update_data["duration"] = duration
                 
-                result = self.db.table("records").update(update_data).eq("id", record_id).eq("user_id", user_id).execute()
+                result = await execute(self.db.table("records").update(update_data).eq("id", record_id).eq("user_id", user_id))
                 if result.data:
-                    return Record(**result.data[0])
+                    return self._cache_record(Record(**result.data[0]))
             
             return None
         except Exception as e:
@@ -95,18 +390,180 @@ class RecordService:
             if storage_url:
                 update_data = {
                     "audio_file_path": storage_url,
+                    "audio_size": len(file_content),
                     "updated_at": "now()"
                 }
                 
-                result = self.db.table("records").update(update_data).eq("id", record_id).eq("user_id", user_id).execute()
+                result = await execute(self.db.table("records").update(update_data).eq("id", record_id).eq("user_id", user_id))
                 if result.data:
-                    return Record(**result.data[0])
+                    return self._cache_record(Record(**result.data[0]))
             
             return None
         except Exception as e:
             print(f"Error uploading audio to storage: {e}")
             return None
 
+    async def upload_audio_stream(self, record_id: str, user_id: str, chunks: AsyncIterator[bytes], filename: str, content_type: str) -> Optional[Record]:
+        """Stream audio chunks to Supabase Storage and point the record at the result"""
+        try:
+            previous_digest = None
+            if settings.storage_dedup_enabled:
+                previous = await execute(self.db.table("records").select("audio_digest").eq("id", record_id).eq("user_id", user_id))
+                if previous.data:
+                    previous_digest = previous.data[0]["audio_digest"]
+            
+            if settings.transcode_enabled or settings.waveform_enabled or settings.storage_dedup_enabled:
+                update_data = await self._store_spooled_audio(record_id, user_id, chunks, filename, content_type)
+            else:
+                update_data = await self._store_audio(record_id, user_id, chunks, filename, content_type)
+            
+            if not update_data:
+                return None
+            
+            update_data["updated_at"] = "now()"
+            new_digest = update_data.get("audio_digest")
+            result = None
+            try:
+                while True:
+                    query = self.db.table("records").update(update_data).eq("id", record_id).eq("user_id", user_id)
+                    if not settings.storage_dedup_enabled:
+                        result = await execute(query)
+                        break
+                    
+                    # Only the upload that actually swaps out previous_digest may release it
+                    if previous_digest:
+                        query = query.eq("audio_digest", previous_digest)
+                    else:
+                        query = query.is_("audio_digest", "null")
+                    result = await execute(query)
+                    if result.data:
+                        break
+                    
+                    # A concurrent upload replaced the digest first; swap against the one it left
+                    current = await execute(self.db.table("records").select("audio_digest").eq("id", record_id).eq("user_id", user_id))
+                    if not current.data:
+                        break
+                    previous_digest = current.data[0]["audio_digest"]
+            finally:
+                if new_digest and not (result and result.data):
+                    # The record never came to point at the new blob, so its reference goes
+                    await blob_service.release(new_digest)
+            
+            if not result.data:
+                return None
+            if previous_digest:
+                # The record dropped its old reference (a re-upload of the same digest nets out)
+                await blob_service.release(previous_digest)
+            return self._cache_record(Record(**result.data[0]))
+        except Exception as e:
+            print(f"Error streaming audio to storage: {e}")
+            return None
+    
+    async def attach_uploaded_audio(self, record_id: str, user_id: str, audio_url: str, metadata: AudioMetadata, audio_size: Optional[int] = None) -> Optional[Record]:
+        """Point a record at audio a client uploaded straight to storage"""
+        previous = await execute(self.db.table("records").select("audio_digest").eq("id", record_id).eq("user_id", user_id))
+        if not previous.data:
+            return None
+        
+        update_data = {
+            "audio_file_path": audio_url,
+            "original_audio_file_path": None,
+            "audio_digest": None,
+            "audio_size": audio_size,
+            "updated_at": "now()",
+        }
+        # Clear values from the previous audio that the new headers do not provide
+        update_data.update(asdict(metadata))
+        
+        result = await execute(self.db.table("records").update(update_data).eq("id", record_id).eq("user_id", user_id))
+        if not result.data:
+            return None
+        
+        if previous.data[0]["audio_digest"]:
+            await blob_service.release(previous.data[0]["audio_digest"])
+        if settings.waveform_enabled:
+            # The API never sees these bytes, so the old peak index would describe the wrong audio
+            await storage_service.remove_objects([f"users/{user_id}/records/{record_id}/{WAVEFORM_FILENAME}"])
+        return self._cache_record(Record(**result.data[0]))
+    
+    async def _store_audio(self, record_id: str, user_id: str, chunks: AsyncIterator[bytes], filename: str, content_type: str) -> Optional[dict]:
+        """Store the upload as-is and return the record fields to update"""
+        probe = AudioProbe()
+        counter = ByteCounter(chunks)
+        storage_url = await storage_service.upload_audio_stream(user_id, record_id, probe.observe(counter), filename, content_type)
+        if not storage_url:
+            return None
+        
+        update_data = {"audio_file_path": storage_url, "audio_size": counter.total}
+        # Header metadata lands in the same update as the new path
+        update_data.update(probe.result().to_update())
+        return update_data
+    
+    async def _store_audio_file(self, record_id: str, user_id: str, path: str, filename: str, content_type: str, digest: Optional[str] = None) -> Optional[dict]:
+        """Store a local audio file, by content digest when deduplication is on"""
+        if not settings.storage_dedup_enabled:
+            return await self._store_audio(record_id, user_id, iter_file(path), filename, content_type)
+        
+        # Probe first so nothing can raise between taking the blob reference and returning it
+        metadata = await run_blocking(AudioProbe().probe_file, path)
+        stored = await blob_service.store_file(path, content_type, digest)
+        if not stored:
+            return None
+        
+        digest, storage_url = stored
+        update_data = {"audio_file_path": storage_url, "audio_digest": digest, "audio_size": os.path.getsize(path)}
+        update_data.update(metadata.to_update())
+        return update_data
+    
+    async def _store_spooled_audio(self, record_id: str, user_id: str, chunks: AsyncIterator[bytes], filename: str, content_type: str) -> Optional[dict]:
+        """Spool the upload to disk for the processing steps that need a whole file"""
+        stream_digest = StreamDigest()
+        source_path = await spool_to_file(stream_digest.observe(chunks), suffix=os.path.splitext(filename)[1])
+        try:
+            if settings.transcode_enabled:
+                update_data = await self._store_transcoded_audio(record_id, user_id, source_path, filename, content_type, stream_digest.hexdigest())
+            else:
+                update_data = await self._store_audio_file(record_id, user_id, source_path, filename, content_type, stream_digest.hexdigest())
+            
+            if update_data and settings.waveform_enabled:
+                # A missing waveform only costs the preview, so it never fails the upload
+                await waveform_service.generate_waveform(user_id, record_id, source_path)
+            return update_data
+        finally:
+            remove_quietly(source_path)
+    
+    async def _store_transcoded_audio(self, record_id: str, user_id: str, source_path: str, filename: str, content_type: str, source_digest: str) -> Optional[dict]:
+        """Transcode a spooled upload off the event loop and store the compact copy"""
+        base_name, extension = os.path.splitext(filename)
+        transcoded = await transcode_service.transcode(source_path)
+        if not transcoded:
+            # Serving the original beats losing the recording
+            print("⚠️  Transcoding failed, storing original upload")
+            update_data = await self._store_audio_file(record_id, user_id, source_path, filename, content_type, source_digest)
+            if update_data:
+                # The stored file is the original, so a previous upload's original must not linger
+                update_data["original_audio_file_path"] = None
+            return update_data
+        
+        try:
+            update_data = await self._store_audio_file(
+                record_id, user_id, transcoded.path, f"{base_name}{transcoded.extension}", transcoded.content_type
+            )
+            if not update_data:
+                return None
+            
+            update_data["original_audio_file_path"] = None
+            if settings.transcode_keep_original:
+                update_data["original_audio_file_path"] = await storage_service.upload_audio_stream(
+                    user_id, record_id, iter_file(source_path), f"{base_name}_original{extension}", content_type
+                )
+                if not update_data["original_audio_file_path"]:
+                    # The transcoded copy is stored, so the upload still succeeds without the original
+                    print(f"⚠️  Storing the original upload for record {record_id} failed; keeping only the transcoded audio")
+            return update_data
+        finally:
+            remove_quietly(transcoded.path)
+
 
 # Service instance
 record_service = RecordService()
@@ -0,0 +1,415 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import AsyncIterator, Awaitable, Callable, List, Optional
+from app.core.config import settings
+from app.core.database import get_service_db, run_blocking
+from app.core.file_response import RangeNotSatisfiable, parse_range
+from app.core.http import get_http_client
+from app.core.streaming import ByteCounter, fsync_directory, iter_file, remove_quietly
+import aiofiles
+import mimetypes
+import os
+import tempfile
+
+
+# Browsers record to these; the platform tables do not always know them as audio
+mimetypes.add_type("audio/webm", ".webm")
+mimetypes.add_type("audio/ogg", ".ogg")
+mimetypes.add_type("audio/ogg", ".opus")
+mimetypes.add_type("audio/flac", ".flac")
+
+
+@dataclass
+class ObjectStream:
+    """An opened (possibly partial) object ready to be sent to a client"""
+    status_code: int  # 200, 206 or 416
+    headers: dict = field(default_factory=dict)
+    body: Optional[AsyncIterator[bytes]] = None
+    # Local files are sent with RangeFileResponse instead of through a body iterator
+    local_path: Optional[str] = None
+    start: int = 0
+    end: int = -1
+    # Releases the upstream response; the body only does so once it has been started
+    close: Optional[Callable[[], Awaitable[None]]] = None
+
+    async def aclose(self):
+        """Release the upstream connection whether or not the body was read"""
+        if self.close is not None:
+            await self.close()
+
+
+@dataclass
+class StorageEntry:
+    """One name directly under a listed prefix"""
+    name: str
+    is_folder: bool
+    updated_at: Optional[datetime] = None
+    size: Optional[int] = None
+
+
+class StorageBackend(ABC):
+    """Where audio objects live; paths are relative keys like users/{id}/records/{id}/file"""
+
+    @abstractmethod
+    async def ensure_ready(self) -> bool:
+        """Prepare the backend (bucket, directory) and report whether it is usable"""
+
+    @abstractmethod
+    async def upload_stream(self, storage_path: str, chunks: AsyncIterator[bytes], content_type: str, upsert: bool = False) -> bool:
+        """Write an object from a chunk stream"""
+
+    @abstractmethod
+    def download_stream(self, storage_path: str) -> AsyncIterator[bytes]:
+        """Yield an object's content in chunks"""
+
+    @abstractmethod
+    async def open_stream(self, storage_path: str, range_header: Optional[str] = None, method: str = "GET") -> Optional[ObjectStream]:
+        """Open an object for sending, honouring a Range header; None if it does not exist"""
+
+    @abstractmethod
+    async def download(self, storage_path: str) -> Optional[bytes]:
+        """Read a small object whole, or None if it does not exist"""
+
+    @abstractmethod
+    async def remove(self, storage_paths: List[str]) -> bool:
+        """Delete several objects"""
+
+    @abstractmethod
+    async def list_page(self, prefix: str, limit: int, offset: int = 0) -> List[StorageEntry]:
+        """One page of the files and folders directly under a prefix, sorted by name"""
+
+    @abstractmethod
+    async def create_upload_url(self, storage_path: str, grant: str) -> str:
+        """URL a client can PUT one new object to without going through the API.
+
+        grant is the API's own signed upload token; backends that cannot sign
+        URLs themselves embed it for their upload route to check.
+        """
+
+    @abstractmethod
+    def public_url(self, storage_path: str) -> str:
+        """URL clients use to fetch the object"""
+
+    @abstractmethod
+    def path_from_url(self, url: str) -> Optional[str]:
+        """Storage path for a URL produced by public_url, or None if it is not ours"""
+
+
+class SupabaseStorageBackend(StorageBackend):
+    def __init__(self, bucket_name: str):
+        self.db = get_service_db()  # Use service client with admin privileges
+        self.bucket_name = bucket_name
+
+    def _object_url(self, storage_path: str) -> str:
+        """Build the Storage REST URL for an object in the bucket"""
+        return f"{settings.supabase_url}/storage/v1/object/{self.bucket_name}/{storage_path}"
+
+    def _auth_headers(self) -> dict:
+        """Headers authenticating Storage REST calls with the service key"""
+        key = settings.supabase_service_key or settings.supabase_key
+        return {"Authorization": f"Bearer {key}", "apikey": key}
+
+    async def ensure_ready(self) -> bool:
+        """Create the audio recordings bucket if it doesn't exist"""
+        try:
+            # Check if bucket exists by trying to list files (this will fail if bucket doesn't exist)
+            try:
+                await run_blocking(self.db.storage.from_(self.bucket_name).list)
+                print(f"✅ Bucket already exists: {self.bucket_name}")
+                return True
+            except Exception as list_error:
+                # If listing fails, bucket might not exist, try to create it
+                print(f"📋 Bucket might not exist, attempting to create: {self.bucket_name}")
+
+                try:
+                    # Create bucket with public access for audio files
+                    await run_blocking(
+                        self.db.storage.create_bucket,
+                        self.bucket_name,
+                        options={
+                            "public": True,
+                            "allowedMimeTypes": ["audio/*", "application/json"],
+                            "fileSizeLimit": 52428800  # 50MB limit
+                        }
+                    )
+                    print(f"✅ Created bucket: {self.bucket_name}")
+                    return True
+                except Exception as create_error:
+                    # If creation fails due to RLS, the bucket might already exist
+                    print(f"⚠️  Could not create bucket (might already exist): {create_error}")
+                    # Try listing again to confirm bucket exists
+                    try:
+                        await run_blocking(self.db.storage.from_(self.bucket_name).list)
+                        print(f"✅ Bucket exists and is accessible: {self.bucket_name}")
+                        return True
+                    except Exception as final_error:
+                        print(f"❌ Bucket is not accessible: {final_error}")
+                        raise final_error
+
+        except Exception as e:
+            print(f"❌ Error with bucket operations: {e}")
+            # Don't raise the error, just log it and continue
+            # The upload might still work if the bucket exists
+            return False
+
+    async def upload_stream(self, storage_path: str, chunks: AsyncIterator[bytes], content_type: str, upsert: bool = False) -> bool:
+        counter = ByteCounter(chunks)
+        headers = {
+            **self._auth_headers(),
+            "content-type": content_type,
+            "cache-control": "max-age=3600",
+            "x-upsert": "true" if upsert else "false",
+        }
+        client = get_http_client()
+        response = await client.post(self._object_url(storage_path), content=counter, headers=headers)
+
+        if response.status_code >= 400:
+            print(f"❌ Upload failed ({response.status_code}): {response.text}")
+            return False
+
+        print(f"📊 Streamed {counter.total} bytes")
+        return True
+
+    async def download_stream(self, storage_path: str) -> AsyncIterator[bytes]:
+        client = get_http_client()
+        async with client.stream("GET", self._object_url(storage_path), headers=self._auth_headers()) as response:
+            response.raise_for_status()
+            async for chunk in response.aiter_bytes(settings.upload_chunk_size):
+                yield chunk
+
+    async def open_stream(self, storage_path: str, range_header: Optional[str] = None, method: str = "GET") -> Optional[ObjectStream]:
+        client = get_http_client()
+        headers = self._auth_headers()
+        if range_header:
+            # Storage answers ranges itself, so only the requested bytes cross the network
+            headers["range"] = range_header
+        request = client.build_request(method, self._object_url(storage_path), headers=headers)
+        response = await client.send(request, stream=True)
+
+        if response.status_code in (400, 404):
+            await response.aclose()
+            return None
+        if response.status_code == 416:
+            await response.aclose()
+            return ObjectStream(status_code=416, headers={"content-range": response.headers.get("content-range", "bytes */*")})
+        if response.status_code >= 400:
+            await response.aclose()
+            print(f"❌ Download failed ({response.status_code})")
+            response.raise_for_status()
+
+        forwarded = {
+            name: response.headers[name]
+            for name in ("content-type", "content-length", "content-range")
+            if name in response.headers
+        }
+
+        async def body():
+            try:
+                async for chunk in response.aiter_bytes(settings.upload_chunk_size):
+                    yield chunk
+            finally:
+                await response.aclose()
+
+        return ObjectStream(status_code=response.status_code, headers=forwarded, body=body(), close=response.aclose)
+
+    async def download(self, storage_path: str) -> Optional[bytes]:
+        client = get_http_client()
+        response = await client.get(self._object_url(storage_path), headers=self._auth_headers())
+        if response.status_code >= 400:
+            if response.status_code not in (400, 404):
+                print(f"❌ Download failed ({response.status_code}): {response.text}")
+            return None
+        return response.content
+
+    async def remove(self, storage_paths: List[str]) -> bool:
+        try:
+            await run_blocking(self.db.storage.from_(self.bucket_name).remove, storage_paths)
+            return True
+        except Exception as e:
+            print(f"Error deleting from storage: {e}")
+            return False
+
+    async def list_page(self, prefix: str, limit: int, offset: int = 0) -> List[StorageEntry]:
+        client = get_http_client()
+        response = await client.post(
+            f"{settings.supabase_url}/storage/v1/object/list/{self.bucket_name}",
+            json={"prefix": prefix, "limit": limit, "offset": offset, "sortBy": {"column": "name", "order": "asc"}},
+            headers=self._auth_headers()
+        )
+        response.raise_for_status()
+
+        entries = []
+        for item in response.json():
+            # Folders are synthesised from object names and have no id or metadata
+            metadata = item.get("metadata") or {}
+            updated_at = item.get("updated_at") or item.get("created_at")
+            entries.append(StorageEntry(
+                name=item["name"],
+                is_folder=item.get("id") is None,
+                updated_at=datetime.fromisoformat(updated_at.replace("Z", "+00:00")) if updated_at else None,
+                size=metadata.get("size"),
+            ))
+        return entries
+
+    async def create_upload_url(self, storage_path: str, grant: str) -> str:
+        client = get_http_client()
+        response = await client.post(
+            f"{settings.supabase_url}/storage/v1/object/upload/sign/{self.bucket_name}/{storage_path}",
+            headers=self._auth_headers()
+        )
+        response.raise_for_status()
+        # Storage returns a path relative to /storage/v1 carrying its own upload token
+        return f"{settings.supabase_url}/storage/v1{response.json()['url']}"
+
+    def public_url(self, storage_path: str) -> str:
+        public_url = self.db.storage.from_(self.bucket_name).get_public_url(storage_path)
+        # Clean the URL by removing trailing question mark
+        if public_url.endswith('?'):
+            public_url = public_url[:-1]
+        return public_url
+
+    def path_from_url(self, url: str) -> Optional[str]:
+        # URL format: https://xxx.supabase.co/storage/v1/object/public/audio-recordings/users/xxx/records/xxx/filename.wav
+        marker = f"/object/public/{self.bucket_name}/"
+        if marker not in url:
+            return None
+        return url.split(marker, 1)[1].split("?", 1)[0]
+
+
+class LocalStorageBackend(StorageBackend):
+    """Objects as files under a local directory, served by the /uploads route"""
+
+    def __init__(self, root: str, base_url: str):
+        self.root = os.path.abspath(root)
+        self.base_url = base_url.rstrip("/")
+
+    def full_path(self, storage_path: str) -> str:
+        """Absolute file path for a storage path, refusing anything outside the root"""
+        full_path = os.path.abspath(os.path.join(self.root, storage_path))
+        if os.path.commonpath([full_path, self.root]) != self.root:
+            raise ValueError(f"Storage path escapes the storage root: {storage_path}")
+        return full_path
+
+    async def ensure_ready(self) -> bool:
+        try:
+            os.makedirs(self.root, exist_ok=True)
+            return os.access(self.root, os.W_OK)
+        except OSError as e:
+            print(f"❌ Local storage directory is not usable: {e}")
+            return False
+
+    async def upload_stream(self, storage_path: str, chunks: AsyncIterator[bytes], content_type: str, upsert: bool = False) -> bool:
+        target = self.full_path(storage_path)
+        if not upsert and os.path.exists(target):
+            print(f"❌ Upload failed: {storage_path} already exists")
+            return False
+
+        directory = os.path.dirname(target)
+        os.makedirs(directory, exist_ok=True)
+        # Write next to the target and rename, so readers never see a partial file
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".upload-")
+        os.close(fd)
+        try:
+            total = 0
+            async with aiofiles.open(temp_path, "wb") as f:
+                async for chunk in chunks:
+                    await f.write(chunk)
+                    total += len(chunk)
+                await f.flush()
+                await run_blocking(os.fsync, f.fileno())
+            if upsert:
+                os.replace(temp_path, target)
+            else:
+                # link() fails if the target exists, so a concurrent writer can never be overwritten
+                try:
+                    os.link(temp_path, target)
+                except FileExistsError:
+                    print(f"❌ Upload failed: {storage_path} already exists")
+                    return False
+                finally:
+                    remove_quietly(temp_path)
+            await run_blocking(fsync_directory, directory)
+        except Exception:
+            remove_quietly(temp_path)
+            raise
+
+        print(f"📊 Wrote {total} bytes")
+        return True
+
+    async def download_stream(self, storage_path: str) -> AsyncIterator[bytes]:
+        async for chunk in iter_file(self.full_path(storage_path)):
+            yield chunk
+
+    async def open_stream(self, storage_path: str, range_header: Optional[str] = None, method: str = "GET") -> Optional[ObjectStream]:
+        path = self.full_path(storage_path)
+        if not os.path.isfile(path):
+            return None
+
+        size = os.path.getsize(path)
+        headers = {"content-type": mimetypes.guess_type(path)[0] or "application/octet-stream"}
+        try:
+            byte_range = parse_range(range_header, size)
+        except RangeNotSatisfiable:
+            return ObjectStream(status_code=416, headers={"content-range": f"bytes */{size}"})
+
+        if byte_range is None:
+            return ObjectStream(status_code=200, headers=headers, local_path=path, start=0, end=size - 1)
+
+        start, end = byte_range
+        headers["content-range"] = f"bytes {start}-{end}/{size}"
+        return ObjectStream(status_code=206, headers=headers, local_path=path, start=start, end=end)
+
+    async def download(self, storage_path: str) -> Optional[bytes]:
+        path = self.full_path(storage_path)
+        if not os.path.isfile(path):
+            return None
+        async with aiofiles.open(path, "rb") as f:
+            return await f.read()
+
+    async def remove(self, storage_paths: List[str]) -> bool:
+        for storage_path in storage_paths:
+            remove_quietly(self.full_path(storage_path))
+        return True
+
+    async def list_page(self, prefix: str, limit: int, offset: int = 0) -> List[StorageEntry]:
+        return await run_blocking(self._list_directory, prefix, limit, offset)
+
+    def _list_directory(self, prefix: str, limit: int, offset: int) -> List[StorageEntry]:
+        directory = self.full_path(prefix)
+        if not os.path.isdir(directory):
+            return []
+        with os.scandir(directory) as scanned:
+            # Skip in-progress writes from upload_stream
+            listed = sorted((entry for entry in scanned if not entry.name.startswith(".upload-")), key=lambda entry: entry.name)
+        entries = []
+        for entry in listed[offset:offset + limit]:
+            stat = entry.stat()
+            entries.append(StorageEntry(
+                name=entry.name,
+                is_folder=entry.is_dir(),
+                updated_at=datetime.fromtimestamp(stat.st_mtime, timezone.utc),
+                size=None if entry.is_dir() else stat.st_size,
+            ))
+        return entries
+
+    async def create_upload_url(self, storage_path: str, grant: str) -> str:
+        return f"{self.base_url}/uploads/{storage_path}?token={grant}"
+
+    def public_url(self, storage_path: str) -> str:
+        return f"{self.base_url}/uploads/{storage_path}"
+
+    def path_from_url(self, url: str) -> Optional[str]:
+        prefix = f"{self.base_url}/uploads/"
+        if not url.startswith(prefix):
+            return None
+        return url[len(prefix):]
+
+
+def create_storage_backend(bucket_name: str) -> StorageBackend:
+    """Build the backend selected by STORAGE_BACKEND"""
+    if settings.storage_backend == "local":
+        return LocalStorageBackend(settings.local_storage_dir or settings.upload_dir, settings.local_storage_base_url)
+    if settings.storage_backend != "supabase":
+        raise ValueError(f"Unknown storage backend: {settings.storage_backend}")
+    return SupabaseStorageBackend(bucket_name)
@@ -1,163 +1,179 @@
-from supabase import Client
-from app.core.database import get_service_db
 from app.core.config import settings
+from app.core.streaming import iter_file
+from app.services.storage_backends import StorageBackend, StorageEntry, ObjectStream, create_storage_backend
+from datetime import datetime
+import aiofiles
+import asyncio
+import mimetypes
 import os
-from typing import Optional
+import time
+from typing import AsyncIterator, List, Optional, Tuple
 import uuid
 
 
+def build_audio_filename(record_id: str, original_filename: str) -> str:
+    """Timestamped object name for a record's audio, keeping the original extension"""
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    file_extension = os.path.splitext(original_filename or "")[1]
+    return f"{record_id}_{timestamp}{file_extension}"
+
+
 class StorageService:
     def __init__(self):
-        self.db: Client = get_service_db()  # Use service client with admin privileges
         self.bucket_name = "audio-recordings"
+        self.backend: StorageBackend = create_storage_backend(self.bucket_name)
+        self._bucket_ready_until = 0.0  # monotonic deadline of the cached readiness check
+        self._bucket_lock = asyncio.Lock()
     
-    async def create_bucket_if_not_exists(self):
-        """Create the audio recordings bucket if it doesn't exist"""
-        try:
-            # Check if bucket exists by trying to list files (this will fail if bucket doesn't exist)
-            try:
-                self.db.storage.from_(self.bucket_name).list()
-                print(f"✅ Bucket already exists: {self.bucket_name}")
+    async def ensure_bucket(self):
+        """Make sure the bucket exists, reusing a recent successful check"""
+        if time.monotonic() < self._bucket_ready_until:
+            return
+        async with self._bucket_lock:
+            # Another upload may have finished the check while we waited
+            if time.monotonic() < self._bucket_ready_until:
                 return
-            except Exception as list_error:
-                # If listing fails, bucket might not exist, try to create it
-                print(f"📋 Bucket might not exist, attempting to create: {self.bucket_name}")
-                
-                try:
-                    # Create bucket with public access for audio files
-                    self.db.storage.create_bucket(
-                        self.bucket_name,
-                        options={
-                            "public": True,
-                            "allowedMimeTypes": ["audio/*"],
-                            "fileSizeLimit": 52428800  # 50MB limit
-                        }
-                    )
-                    print(f"✅ Created bucket: {self.bucket_name}")
-                except Exception as create_error:
-                    # If creation fails due to RLS, the bucket might already exist
-                    print(f"⚠️  Could not create bucket (might already exist): {create_error}")
-                    # Try listing again to confirm bucket exists
-                    try:
-                        self.db.storage.from_(self.bucket_name).list()
-                        print(f"✅ Bucket exists and is accessible: {self.bucket_name}")
-                    except Exception as final_error:
-                        print(f"❌ Bucket is not accessible: {final_error}")
-                        raise final_error
-                        
-        except Exception as e:
-            print(f"❌ Error with bucket operations: {e}")
-            # Don't raise the error, just log it and continue
-            # The upload might still work if the bucket exists
+            if await self.create_bucket_if_not_exists():
+                self._bucket_ready_until = time.monotonic() + settings.bucket_check_ttl_seconds
+    
+    def invalidate_bucket(self):
+        """Forget the cached bucket check so the next upload verifies it again"""
+        self._bucket_ready_until = 0.0
+    
+    async def create_bucket_if_not_exists(self) -> bool:
+        """Create the audio recordings bucket if it doesn't exist, returning whether it is usable"""
+        return await self.backend.ensure_ready()
     
     async def upload_audio_file(self, user_id: str, record_id: str, audio_file_path: str, file_extension: str = ".wav") -> Optional[str]:
         """Upload audio file to user-specific folder in storage bucket"""
-        try:
-            # Ensure bucket exists (but don't fail if we can't create it)
-            await self.create_bucket_if_not_exists()
-            
-            # Check if file exists
-            if not os.path.exists(audio_file_path):
-                print(f"❌ File not found: {audio_file_path}")
-                return None
-            
-            # Create user-specific folder path
-            folder_path = f"users/{user_id}/records/{record_id}"
-            
-            # Generate unique filename
-            filename = f"recording_{uuid.uuid4().hex}{file_extension}"
-            storage_path = f"{folder_path}/{filename}"
-            
-            print(f"📁 Uploading to: {storage_path}")
-            
-            # Read file content
-            with open(audio_file_path, 'rb') as f:
-                file_content = f.read()
-            
-            print(f"📊 File size: {len(file_content)} bytes")
-            
-            # Upload to Supabase Storage with proper content type
-            result = self.db.storage.from_(self.bucket_name).upload(
-                storage_path,
-                file_content,
-                {"content-type": "audio/wav"}
-            )
-            
-            if result:
-                # Get public URL and clean it (remove trailing ? if present)
-                public_url = self.db.storage.from_(self.bucket_name).get_public_url(storage_path)
-                # Clean the URL by removing trailing question mark
-                if public_url.endswith('?'):
-                    public_url = public_url[:-1]
-                print(f"✅ Upload successful: {public_url}")
-                return public_url
-            else:
-                print("❌ Upload failed - no result returned")
-                return None
-            
-        except Exception as e:
-            print(f"❌ Error uploading to storage: {e}")
-            import traceback
-            traceback.print_exc()
+        # Check if file exists
+        if not os.path.exists(audio_file_path):
+            print(f"❌ File not found: {audio_file_path}")
             return None
+        
+        # Generate unique filename
+        filename = f"recording_{uuid.uuid4().hex}{file_extension}"
+        content_type = mimetypes.guess_type(audio_file_path)[0] or "audio/wav"
+        return await self.upload_audio_stream(user_id, record_id, iter_file(audio_file_path), filename, content_type)
 
     async def upload_audio_content(self, user_id: str, record_id: str, file_content: bytes, filename: str, content_type: str) -> Optional[str]:
         """Upload audio content directly to storage bucket"""
+        async def single_chunk():
+            yield file_content
+        
+        return await self.upload_audio_stream(user_id, record_id, single_chunk(), filename, content_type)
+    
+    def public_url(self, storage_path: str) -> str:
+        """Get public URL for a storage path"""
+        return self.backend.public_url(storage_path)
+    
+    async def create_upload_url(self, storage_path: str, grant: str) -> str:
+        """Signed URL for a client to upload an object straight to storage"""
+        await self.ensure_bucket()
+        return await self.backend.create_upload_url(storage_path, grant)
+    
+    def path_from_url(self, url: str) -> Optional[str]:
+        """Storage path behind a URL stored on a record"""
+        return self.backend.path_from_url(url)
+    
+    def record_object_path(self, url: str, user_id: str, record_id: str, digest: Optional[str] = None) -> Optional[str]:
+        """Storage path behind a record's URL, but only if the record may touch it.
+        
+        Records own the objects in their own folder, plus the shared blob of their
+        digest when one is given. Anything else, such as a URL a client set to point
+        at another user's object, yields None.
+        """
+        storage_path = self.path_from_url(url)
+        if not storage_path or ".." in storage_path.split("/"):
+            return None
+        if storage_path.startswith(f"users/{user_id}/records/{record_id}/"):
+            return storage_path
+        if digest and os.path.splitext(storage_path)[0] == f"blobs/sha256/{digest[:2]}/{digest}":
+            return storage_path
+        return None
+    
+    async def upload_object_stream(self, storage_path: str, chunks: AsyncIterator[bytes], content_type: str, upsert: bool = False) -> bool:
+        """Stream chunks to a storage object without holding the whole file in memory"""
+        uploaded = await self.backend.upload_stream(storage_path, chunks, content_type, upsert)
+        if not uploaded:
+            # A missing bucket shows up as a failed write; re-check on the next upload
+            self.invalidate_bucket()
+        return uploaded
+    
+    def download_object_stream(self, storage_path: str) -> AsyncIterator[bytes]:
+        """Yield a storage object's content in chunks as it arrives"""
+        return self.backend.download_stream(storage_path)
+    
+    async def open_object_stream(self, storage_path: str, range_header: Optional[str] = None, method: str = "GET") -> Optional[ObjectStream]:
+        """Open a storage object (or a byte range of it) for streaming to a client"""
+        return await self.backend.open_stream(storage_path, range_header, method)
+    
+    async def read_object_range(self, storage_path: str, range_header: str) -> Optional[Tuple[bytes, int]]:
+        """Fetch a small byte range of an object, returning (bytes, total object size)"""
+        stream = await self.open_object_stream(storage_path, range_header)
+        if stream is None or stream.status_code == 416:
+            return None
+        
+        if stream.local_path:
+            async with aiofiles.open(stream.local_path, "rb") as f:
+                await f.seek(stream.start)
+                data = await f.read(stream.end - stream.start + 1)
+        else:
+            data = b"".join([chunk async for chunk in stream.body])
+        
+        content_range = stream.headers.get("content-range")
+        total = int(content_range.rsplit("/", 1)[1]) if content_range else len(data)
+        return data, total
+    
+    async def download_object(self, storage_path: str) -> Optional[bytes]:
+        """Download a small storage object whole, or None if it does not exist"""
+        return await self.backend.download(storage_path)
+    
+    async def list_objects(self, prefix: str, limit: int, offset: int = 0) -> List[StorageEntry]:
+        """One page of the files and folders directly under a prefix"""
+        return await self.backend.list_page(prefix, limit, offset)
+    
+    async def remove_objects(self, storage_paths: List[str]) -> bool:
+        """Remove several storage objects, batching to the backend's per-call limit"""
+        removed = True
+        for start in range(0, len(storage_paths), settings.storage_remove_batch_size):
+            batch = storage_paths[start:start + settings.storage_remove_batch_size]
+            removed = await self.backend.remove(batch) and removed
+        return removed
+    
+    async def upload_audio_stream(self, user_id: str, record_id: str, chunks: AsyncIterator[bytes], filename: str, content_type: str) -> Optional[str]:
+        """Stream audio content to the user-specific folder in the storage bucket"""
         try:
             # Ensure bucket exists (but don't fail if we can't create it)
-            await self.create_bucket_if_not_exists()
-            
-            # Create user-specific folder path
-            folder_path = f"users/{user_id}/records/{record_id}"
-            storage_path = f"{folder_path}/{filename}"
+            await self.ensure_bucket()
             
-            print(f"📁 Uploading to: {storage_path}")
-            print(f"📊 File size: {len(file_content)} bytes")
-            
-            # Upload to Supabase Storage with proper content type
-            result = self.db.storage.from_(self.bucket_name).upload(
-                storage_path,
-                file_content,
-                {"content-type": content_type}
-            )
+            storage_path = f"users/{user_id}/records/{record_id}/{filename}"
+            print(f"📁 Streaming to: {storage_path}")
             
-            if result:
-                # Get public URL and clean it (remove trailing ? if present)
-                public_url = self.db.storage.from_(self.bucket_name).get_public_url(storage_path)
-                # Clean the URL by removing trailing question mark
-                if public_url.endswith('?'):
-                    public_url = public_url[:-1]
-                print(f"✅ Upload successful: {public_url}")
-                return public_url
-            else:
-                print("❌ Upload failed - no result returned")
+            if not await self.upload_object_stream(storage_path, chunks, content_type):
                 return None
             
+            public_url = self.public_url(storage_path)
+            print(f"✅ Upload successful: {public_url}")
+            return public_url
+            
         except Exception as e:
-            print(f"❌ Error uploading to storage: {e}")
+            print(f"❌ Error streaming to storage: {e}")
+            self.invalidate_bucket()
             import traceback
             traceback.print_exc()
             return None
     
     async def delete_audio_file(self, user_id: str, record_id: str, filename: str) -> bool:
         """Delete audio file from storage"""
-        try:
-            storage_path = f"users/{user_id}/records/{record_id}/{filename}"
-            result = self.db.storage.from_(self.bucket_name).remove([storage_path])
-            return True
-        except Exception as e:
-            print(f"Error deleting from storage: {e}")
-            return False
+        storage_path = f"users/{user_id}/records/{record_id}/{filename}"
+        return await self.remove_objects([storage_path])
     
     async def get_audio_url(self, user_id: str, record_id: str, filename: str) -> Optional[str]:
         """Get public URL for audio file"""
         try:
             storage_path = f"users/{user_id}/records/{record_id}/{filename}"
-            public_url = self.db.storage.from_(self.bucket_name).get_public_url(storage_path)
-            # Clean the URL by removing trailing question mark
-            if public_url.endswith('?'):
-                public_url = public_url[:-1]
-            return public_url
+            return self.public_url(storage_path)
         except Exception as e:
             print(f"Error getting audio URL: {e}")
             return None
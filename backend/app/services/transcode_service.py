@@ -0,0 +1,76 @@
+from dataclasses import dataclass
+from typing import Optional
+from app.core.config import settings
+from app.core.processes import run_in_process
+import os
+import subprocess
+import tempfile
+
+
+# Output formats for speech; Opus in Ogg is the compact default, FLAC is lossless
+CODECS = {
+    "opus": {
+        "extension": ".ogg",
+        "content_type": "audio/ogg",
+        "args": ["-c:a", "libopus", "-application", "voip"],
+        "uses_bitrate": True,
+    },
+    "flac": {
+        "extension": ".flac",
+        "content_type": "audio/flac",
+        "args": ["-c:a", "flac", "-compression_level", "8"],
+        "uses_bitrate": False,
+    },
+}
+
+
+@dataclass
+class TranscodeResult:
+    path: str
+    extension: str
+    content_type: str
+
+
+def _transcode_file(ffmpeg_path: str, source_path: str, target_path: str, codec: str, bitrate: str, timeout: int):
+    """Run ffmpeg for one file; executed inside a worker process"""
+    spec = CODECS[codec]
+    args = [ffmpeg_path, "-nostdin", "-y", "-loglevel", "error", "-i", source_path, "-vn", *spec["args"]]
+    if spec["uses_bitrate"]:
+        args += ["-b:a", bitrate]
+    args.append(target_path)
+    subprocess.run(args, check=True, capture_output=True, timeout=timeout)
+
+
+class TranscodeService:
+    async def transcode(self, source_path: str) -> Optional[TranscodeResult]:
+        """Transcode a spooled upload to the configured codec"""
+        codec = settings.transcode_codec
+        if codec not in CODECS:
+            print(f"❌ Unknown transcode codec: {codec}")
+            return None
+
+        spec = CODECS[codec]
+        fd, target_path = tempfile.mkstemp(suffix=spec["extension"], dir=settings.spool_dir)
+        os.close(fd)
+
+        try:
+            await run_in_process(
+                _transcode_file,
+                settings.ffmpeg_path,
+                source_path,
+                target_path,
+                codec,
+                settings.transcode_bitrate,
+                settings.transcode_timeout
+            )
+        except Exception as e:
+            print(f"❌ Error transcoding audio: {e}")
+            os.remove(target_path)
+            return None
+
+        print(f"🎛️  Transcoded {os.path.getsize(source_path)} -> {os.path.getsize(target_path)} bytes ({codec})")
+        return TranscodeResult(path=target_path, extension=spec["extension"], content_type=spec["content_type"])
+
+
+# Service instance
+transcode_service = TranscodeService()
@@ -0,0 +1,249 @@
+from typing import AsyncIterator, Dict, List, Optional
+from app.core.config import settings
+from app.core.database import get_db, execute
+from app.core.streaming import ByteCounter, iter_file, remove_quietly, write_durably
+from app.models.upload_job import UploadJob, UploadJobStatus
+from app.services.record_service import record_service
+from supabase import Client
+from datetime import datetime, timedelta, timezone
+import asyncio
+import os
+import socket
+import uuid
+
+
+class UploadJobError(Exception):
+    """Raised when an upload cannot be accepted for background processing"""
+
+
+class UploadJobService:
+    """Accept uploads onto local disk and store them from a pool of worker tasks.
+
+    The spooled file and the upload_jobs row are both written before the client
+    gets its 202, so a restart picks unfinished jobs up again from disk.
+    """
+
+    def __init__(self):
+        self.db: Client = get_db()
+        self.queue: Optional[asyncio.Queue] = None
+        self.workers: List[asyncio.Task] = []
+        self.progress: Dict[str, ByteCounter] = {}  # jobs this process is storing right now
+        self.claimed: set = set()  # jobs a worker here has claimed and not finished with
+        self.retries: set = set()  # delayed requeues, referenced so they are not collected
+
+    @property
+    def running(self) -> bool:
+        return bool(self.workers)
+
+    def _spool_dir(self) -> str:
+        return settings.upload_job_dir or os.path.join(settings.upload_dir, "jobs")
+
+    def _spool_host(self) -> str:
+        return settings.upload_job_host or socket.gethostname()
+
+    def _spool_path(self, job_id: str) -> str:
+        return os.path.join(self._spool_dir(), f"{job_id}.upload")
+
+    async def start(self):
+        """Start the workers and requeue jobs a previous run did not finish"""
+        if self.running:
+            return
+        self.queue = asyncio.Queue()
+        self.workers = [asyncio.create_task(self._worker()) for _ in range(settings.upload_job_workers)]
+        await self._recover()
+
+    async def stop(self):
+        """Stop the workers; a job cut off mid-way stays 'processing' and is retried on start"""
+        tasks = self.workers + list(self.retries)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.workers = []
+
+    async def _recover(self):
+        """Queue unfinished jobs spooled on this host; every process here does this, and claiming keeps each job with one of them"""
+        # Jobs spooled on other hosts are left to those hosts, whose disks hold the uploads
+        spool_host = self._spool_host()
+
+        # A 'processing' job is only taken over once its owner has been silent for a while
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=settings.upload_job_stale_seconds)
+        await execute(self.db.table("upload_jobs").update({
+            "status": "queued",
+            "updated_at": "now()",
+        }).eq("spool_host", spool_host).eq("status", "processing").lt("updated_at", cutoff.isoformat()))
+
+        result = await execute(
+            self.db.table("upload_jobs").select("*").eq("spool_host", spool_host).eq("status", "queued").order("created_at")
+        )
+        for row in result.data:
+            job = UploadJob(**row)
+            if os.path.exists(self._spool_path(job.id)):
+                self.queue.put_nowait(job.id)
+            else:
+                # Lost with this host's disk
+                await execute(self.db.table("upload_jobs").update({
+                    "status": "failed",
+                    "error": "Spooled upload is no longer available",
+                    "updated_at": "now()",
+                    "finished_at": "now()",
+                }).eq("id", job.id).eq("status", "queued"))
+        if result.data:
+            print(f"🔁 Recovered {len(result.data)} unfinished upload jobs")
+
+    async def enqueue_upload(self, record_id: str, user_id: str, chunks: AsyncIterator[bytes], filename: str, content_type: str) -> UploadJob:
+        """Spool an upload durably and queue it, returning the new job"""
+        if not self.running:
+            raise UploadJobError("Background upload processing is not available")
+        if self.queue.qsize() >= settings.upload_job_max_pending:
+            raise UploadJobError("Too many uploads are waiting to be processed")
+
+        job_id = str(uuid.uuid4())
+        spool_path = self._spool_path(job_id)
+        size = await write_durably(chunks, spool_path)
+
+        job_dict = {
+            "id": job_id,
+            "record_id": record_id,
+            "user_id": user_id,
+            "filename": filename,
+            "content_type": content_type,
+            "size": size,
+            "spool_host": self._spool_host(),
+            "status": "queued",
+            "created_at": "now()",
+            "updated_at": "now()",
+        }
+        try:
+            result = await execute(self.db.table("upload_jobs").insert(job_dict))
+        except Exception:
+            remove_quietly(spool_path)
+            raise
+
+        self.queue.put_nowait(job_id)
+        return UploadJob(**result.data[0])
+
+    async def get_job(self, job_id: str, user_id: str) -> Optional[UploadJobStatus]:
+        """Get a job owned by the user, with live progress and the finished record"""
+        result = await execute(self.db.table("upload_jobs").select("*").eq("id", job_id).eq("user_id", user_id))
+        if not result.data:
+            return None
+
+        job = UploadJobStatus(**result.data[0])
+        counter = self.progress.get(job_id)
+        if counter is not None:
+            job.bytes_processed = counter.total
+        elif job.status == "succeeded":
+            job.bytes_processed = job.size
+            job.record = await record_service.get_record_by_id(job.record_id, user_id)
+        return job
+
+    async def _worker(self):
+        while True:
+            job_id = await self.queue.get()
+            try:
+                await self._process(job_id)
+            except Exception as e:
+                print(f"❌ Upload job {job_id} crashed: {e}")
+                if job_id in self.claimed:
+                    try:
+                        await self._retry_or_fail(job_id, f"Upload job crashed: {e}")
+                    except Exception as e:
+                        # Left 'processing'; a later start takes it over once it is stale
+                        print(f"❌ Could not record the failure of upload job {job_id}: {e}")
+            finally:
+                self.claimed.discard(job_id)
+                self.progress.pop(job_id, None)
+                self.queue.task_done()
+
+    async def _process(self, job_id: str):
+        result = await execute(self.db.table("upload_jobs").select("*").eq("id", job_id))
+        if not result.data or result.data[0]["status"] != "queued":
+            return
+        job = UploadJob(**result.data[0])
+        spool_path = self._spool_path(job.id)
+
+        # Claim the job in one conditional update; another worker or process that got there first wins
+        claimed = await execute(self.db.table("upload_jobs").update({
+            "status": "processing",
+            "attempts": job.attempts + 1,
+            "updated_at": "now()",
+        }).eq("id", job.id).eq("status", "queued").eq("attempts", job.attempts))
+        if not claimed.data:
+            return
+        self.claimed.add(job.id)
+        heartbeat = asyncio.create_task(self._heartbeat(job.id))
+        try:
+            record = await record_service.get_record_by_id(job.record_id, job.user_id)
+            if not record:
+                await self._finish(job.id, "failed", "Record not found")
+                return
+
+            counter = ByteCounter(iter_file(spool_path))
+            self.progress[job.id] = counter
+            updated_record = await record_service.upload_audio_stream(
+                job.record_id,
+                job.user_id,
+                counter,
+                job.filename,
+                job.content_type
+            )
+        finally:
+            heartbeat.cancel()
+
+        if updated_record:
+            await self._finish(job.id, "succeeded")
+        else:
+            await self._retry_or_fail(job.id, "Failed to upload audio to storage")
+
+    async def _heartbeat(self, job_id: str):
+        """Keep updated_at fresh while storing, so a long upload is never mistaken for a stale one"""
+        interval = settings.upload_job_stale_seconds / 3
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await execute(self.db.table("upload_jobs").update({
+                    "updated_at": "now()",
+                }).eq("id", job_id).eq("status", "processing"))
+            except Exception as e:
+                # Two more chances before the job goes stale
+                print(f"⚠️  Upload job {job_id} heartbeat failed: {e}")
+
+    async def _retry_or_fail(self, job_id: str, error: str):
+        """Requeue a job that did not finish after a delay, or fail it once out of attempts"""
+        result = await execute(self.db.table("upload_jobs").select("attempts, status").eq("id", job_id))
+        if not result.data or result.data[0]["status"] not in ("queued", "processing"):
+            return
+        attempts = result.data[0]["attempts"]
+        if attempts < settings.upload_job_max_attempts:
+            await self._set_status(job_id, "queued", f"{error}; retrying")
+            retry = asyncio.create_task(self._requeue_later(job_id, settings.upload_job_retry_delay * max(attempts, 1)))
+            self.retries.add(retry)
+            retry.add_done_callback(self.retries.discard)
+        else:
+            await self._finish(job_id, "failed", error)
+
+    async def _requeue_later(self, job_id: str, delay: float):
+        await asyncio.sleep(delay)
+        if self.running:
+            self.queue.put_nowait(job_id)
+
+    async def _set_status(self, job_id: str, status: str, error: Optional[str] = None):
+        await execute(self.db.table("upload_jobs").update({
+            "status": status,
+            "error": error,
+            "updated_at": "now()",
+        }).eq("id", job_id))
+
+    async def _finish(self, job_id: str, status: str, error: Optional[str] = None):
+        """Record the outcome and drop the spooled file"""
+        await execute(self.db.table("upload_jobs").update({
+            "status": status,
+            "error": error,
+            "updated_at": "now()",
+            "finished_at": "now()",
+        }).eq("id", job_id))
+        remove_quietly(self._spool_path(job_id))
+
+
+# Service instance
+upload_job_service = UploadJobService()
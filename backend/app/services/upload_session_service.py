@@ -0,0 +1,163 @@
+from typing import AsyncIterator, List, Optional
+from datetime import datetime, timedelta, timezone
+from app.core.config import settings
+from app.core.database import get_db, execute
+from app.models.record import Record
+from app.models.upload_session import UploadSessionCreate, UploadSession, UploadSessionStatus, UploadChunk
+from app.services.record_service import record_service
+from app.services.storage_service import storage_service, build_audio_filename
+from supabase import Client
+
+
+class UploadSessionError(Exception):
+    """Raised when a chunk or commit does not fit the session it targets"""
+
+
+class UploadSessionService:
+    def __init__(self):
+        self.db: Client = get_db()
+
+    def _chunk_path(self, session: UploadSession, chunk_index: int) -> str:
+        """Storage path of one chunk, kept under the record's folder until commit"""
+        return f"users/{session.user_id}/records/{session.record_id}/sessions/{session.id}/{chunk_index:06d}.part"
+
+    async def create_session(self, record_id: str, user_id: str, session_data: UploadSessionCreate) -> UploadSession:
+        """Open a new resumable upload session for a record"""
+        chunk_size = session_data.chunk_size or settings.upload_session_chunk_size
+        if chunk_size <= 0:
+            raise UploadSessionError("chunk_size must be positive")
+        if chunk_size > settings.upload_session_max_chunk_size:
+            raise UploadSessionError(f"chunk_size must be at most {settings.upload_session_max_chunk_size} bytes")
+
+        expires_at = datetime.now(timezone.utc) + timedelta(hours=settings.upload_session_ttl_hours)
+        session_dict = {
+            "record_id": record_id,
+            "user_id": user_id,
+            "filename": session_data.filename,
+            "content_type": session_data.content_type,
+            "chunk_size": chunk_size,
+            "total_size": session_data.total_size,
+            "status": "open",
+            "expires_at": expires_at.isoformat(),
+            "created_at": "now()",
+            "updated_at": "now()",
+        }
+        result = await execute(self.db.table("upload_sessions").insert(session_dict))
+        return UploadSession(**result.data[0])
+
+    async def get_session(self, session_id: str, record_id: str, user_id: str) -> Optional[UploadSession]:
+        """Get an upload session owned by the user for the given record"""
+        result = await execute(self.db.table("upload_sessions").select("*").eq("id", session_id).eq("record_id", record_id).eq("user_id", user_id))
+        if result.data:
+            return UploadSession(**result.data[0])
+        return None
+
+    async def get_received_chunks(self, session: UploadSession) -> List[UploadChunk]:
+        """List the chunks received so far, ordered by index"""
+        result = await execute(self.db.table("upload_session_chunks").select("chunk_index, size").eq("session_id", session.id).order("chunk_index"))
+        return [
+            UploadChunk(index=row["chunk_index"], offset=row["chunk_index"] * session.chunk_size, size=row["size"])
+            for row in result.data
+        ]
+
+    async def get_session_status(self, session: UploadSession) -> UploadSessionStatus:
+        """Session details plus the offsets the server already holds"""
+        chunks = await self.get_received_chunks(session)
+        return UploadSessionStatus(
+            **session.model_dump(),
+            received_chunks=chunks,
+            received_bytes=sum(chunk.size for chunk in chunks)
+        )
+
+    def _check_open(self, session: UploadSession):
+        if session.status != "open":
+            raise UploadSessionError(f"Upload session is {session.status}")
+        if session.expires_at < datetime.now(timezone.utc):
+            raise UploadSessionError("Upload session has expired")
+
+    async def put_chunk(self, session: UploadSession, chunk_index: int, chunks: AsyncIterator[bytes]) -> UploadChunk:
+        """Store one numbered chunk; re-sending the same index overwrites it"""
+        self._check_open(session)
+        if chunk_index < 0:
+            raise UploadSessionError("Chunk index must not be negative")
+        if session.total_size is not None and chunk_index * session.chunk_size >= session.total_size:
+            raise UploadSessionError("Chunk index is past the declared total size")
+
+        received = 0
+
+        async def limited():
+            nonlocal received
+            async for chunk in chunks:
+                received += len(chunk)
+                if received > session.chunk_size:
+                    raise UploadSessionError(f"Chunk exceeds the session chunk size of {session.chunk_size} bytes")
+                yield chunk
+
+        uploaded = await storage_service.upload_object_stream(
+            self._chunk_path(session, chunk_index),
+            limited(),
+            session.content_type,
+            upsert=True
+        )
+        if not uploaded:
+            raise UploadSessionError("Failed to store chunk")
+
+        await execute(self.db.table("upload_session_chunks").upsert({
+            "session_id": session.id,
+            "chunk_index": chunk_index,
+            "size": received,
+        }))
+        await execute(self.db.table("upload_sessions").update({"updated_at": "now()"}).eq("id", session.id))
+
+        return UploadChunk(index=chunk_index, offset=chunk_index * session.chunk_size, size=received)
+
+    async def commit_session(self, session: UploadSession) -> Optional[Record]:
+        """Assemble the received chunks into the record's audio object"""
+        self._check_open(session)
+        chunks = await self.get_received_chunks(session)
+        if not chunks:
+            raise UploadSessionError("No chunks have been uploaded")
+
+        for position, chunk in enumerate(chunks):
+            if chunk.index != position:
+                raise UploadSessionError(f"Missing chunk {position}")
+            if position < len(chunks) - 1 and chunk.size != session.chunk_size:
+                raise UploadSessionError(f"Chunk {position} is {chunk.size} bytes, expected {session.chunk_size}")
+
+        total = sum(chunk.size for chunk in chunks)
+        if session.total_size is not None and total != session.total_size:
+            raise UploadSessionError(f"Received {total} bytes, expected {session.total_size}")
+
+        chunk_paths = [self._chunk_path(session, chunk.index) for chunk in chunks]
+
+        async def assembled():
+            # Chunks are read back one at a time so memory stays flat
+            for path in chunk_paths:
+                async for data in storage_service.download_object_stream(path):
+                    yield data
+
+        filename = build_audio_filename(session.record_id, session.filename)
+        record = await record_service.upload_audio_stream(
+            session.record_id,
+            session.user_id,
+            assembled(),
+            filename,
+            session.content_type
+        )
+        if not record:
+            return None
+
+        await storage_service.remove_objects(chunk_paths)
+        await execute(self.db.table("upload_sessions").update({"status": "committed", "updated_at": "now()"}).eq("id", session.id))
+        return record
+
+    async def abort_session(self, session: UploadSession) -> bool:
+        """Drop an upload session and any chunks it received"""
+        chunks = await self.get_received_chunks(session)
+        await storage_service.remove_objects([self._chunk_path(session, chunk.index) for chunk in chunks])
+        result = await execute(self.db.table("upload_sessions").delete().eq("id", session.id))
+        return len(result.data) > 0
+
+
+# Service instance
+upload_session_service = UploadSessionService()
@@ -1,12 +1,19 @@
-from typing import Optional, List
-from app.core.database import get_db
+from typing import Dict, Optional, List
+from app.core.auth import revocation_list
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.database import get_db, execute
 from app.models.user import UserCreate, User
 from supabase import Client
+import asyncio
 
 
 class UserService:
     def __init__(self):
         self.db: Client = get_db()
+        # Users resolved for authentication; other processes' updates show up once entries expire
+        self.cache = TTLCache(settings.user_cache_size, settings.user_cache_ttl_seconds)
+        self.loading: Dict[str, asyncio.Task] = {}  # lookups in flight, shared by concurrent misses
     
     async def create_user(self, user_data: UserCreate) -> User:
         """Create a new user"""
@@ -14,41 +21,79 @@ class UserService:
         user_dict["created_at"] = "now()"
         user_dict["updated_at"] = "now()"
         
-        result = self.db.table("users").insert(user_dict).execute()
+        result = await execute(self.db.table("users").insert(user_dict))
         return User(**result.data[0])
     
     async def get_user_by_email(self, email: str) -> Optional[User]:
         """Get user by email"""
-        result = self.db.table("users").select("*").eq("email", email).execute()
+        result = await execute(self.db.table("users").select("*").eq("email", email))
         if result.data:
             return User(**result.data[0])
         return None
     
     async def get_user_by_google_id(self, google_id: str) -> Optional[User]:
         """Get user by Google ID"""
-        result = self.db.table("users").select("*").eq("google_id", google_id).execute()
+        result = await execute(self.db.table("users").select("*").eq("google_id", google_id))
         if result.data:
             return User(**result.data[0])
         return None
     
     async def get_user_by_id(self, user_id: str) -> Optional[User]:
         """Get user by ID"""
-        result = self.db.table("users").select("*").eq("id", user_id).execute()
+        result = await execute(self.db.table("users").select("*").eq("id", user_id))
         if result.data:
             return User(**result.data[0])
         return None
     
+    async def get_cached_user(self, user_id: str) -> Optional[User]:
+        """Get user by ID for authentication, from the cache when possible.
+        
+        Concurrent misses for the same user wait on a single query.
+        """
+        user = self.cache.get(user_id)
+        if user is not None:
+            return user
+        
+        task = self.loading.get(user_id)
+        if task is None:
+            task = asyncio.ensure_future(self.get_user_by_id(user_id))
+            self.loading[user_id] = task
+            task.add_done_callback(lambda done: self._user_loaded(user_id, done))
+        # A disconnecting client must not cancel the lookup other requests are waiting on
+        return await asyncio.shield(task)
+    
+    def _user_loaded(self, user_id: str, task: asyncio.Task):
+        # A lookup that was invalidated while in flight may have read the old row
+        if self.loading.get(user_id) is not task:
+            return
+        del self.loading[user_id]
+        if not task.cancelled() and task.exception() is None and task.result() is not None:
+            self.cache.set(user_id, task.result())
+    
+    def _forget_user(self, user_id: str):
+        self.cache.delete(user_id)
+        self.loading.pop(user_id, None)
+    
+    def cache_stats(self) -> dict:
+        return {**self.cache.stats(), "loading": len(self.loading)}
+    
     async def update_user(self, user_id: str, user_data: dict) -> Optional[User]:
         """Update user"""
         user_data["updated_at"] = "now()"
-        result = self.db.table("users").update(user_data).eq("id", user_id).execute()
+        result = await execute(self.db.table("users").update(user_data).eq("id", user_id))
+        self._forget_user(user_id)
         if result.data:
-            return User(**result.data[0])
+            user = User(**result.data[0])
+            self.cache.set(user_id, user)
+            return user
         return None
     
     async def delete_user(self, user_id: str) -> bool:
         """Delete user"""
-        result = self.db.table("users").delete().eq("id", user_id).execute()
+        result = await execute(self.db.table("users").delete().eq("id", user_id))
+        self._forget_user(user_id)
+        # Self-contained tokens would otherwise keep working until they expire
+        revocation_list.revoke_user(user_id)
         return len(result.data) > 0
 
 
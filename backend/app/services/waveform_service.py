@@ -0,0 +1,153 @@
+from typing import Iterator, List, Optional, Tuple
+from app.core.config import settings
+from app.core.processes import run_in_process
+from app.services.storage_service import storage_service
+import base64
+import json
+import subprocess
+import wave
+
+
+WAVEFORM_FILENAME = "waveform.json"
+
+
+def _pcm_blocks(ffmpeg_path: str, source_path: str, decode_rate: int, block_frames: int) -> Tuple[int, int, Iterator[bytes]]:
+    """Open a file as 16-bit PCM, returning (sample_rate, channels, block iterator)"""
+    try:
+        reader = wave.open(source_path, "rb")
+        if reader.getsampwidth() == 2 and reader.getcomptype() == "NONE":
+            def wav_blocks():
+                with reader:
+                    while True:
+                        block = reader.readframes(block_frames)
+                        if not block:
+                            break
+                        yield block
+            return reader.getframerate(), reader.getnchannels(), wav_blocks()
+        reader.close()
+    except (wave.Error, EOFError):
+        pass
+
+    # Anything else is decoded to mono PCM by ffmpeg and read from its stdout
+    process = subprocess.Popen(
+        [ffmpeg_path, "-nostdin", "-loglevel", "error", "-i", source_path, "-vn",
+         "-ac", "1", "-ar", str(decode_rate), "-f", "s16le", "-"],
+        stdout=subprocess.PIPE,
+    )
+
+    def ffmpeg_blocks():
+        try:
+            while True:
+                block = process.stdout.read(block_frames * 2)
+                if not block:
+                    break
+                yield block
+        finally:
+            process.stdout.close()
+            if process.wait() != 0:
+                raise RuntimeError(f"ffmpeg exited with status {process.returncode}")
+
+    return decode_rate, 1, ffmpeg_blocks()
+
+
+def _compute_peaks(ffmpeg_path: str, source_path: str, decode_rate: int, levels: List[int]) -> dict:
+    """Build the min/max peak index for a file; executed inside a worker process"""
+    import numpy as np
+
+    levels = sorted(levels)
+    base = levels[0]
+    sample_rate, channels, blocks = _pcm_blocks(ffmpeg_path, source_path, decode_rate, base * 1024)
+    bucket = base * channels  # interleaved samples per finest peak
+
+    mins, maxs = [], []
+    carry = np.empty(0, dtype=np.int16)
+    for block in blocks:
+        samples = np.concatenate((carry, np.frombuffer(block, dtype="<i2")))
+        whole = len(samples) - len(samples) % bucket
+        if whole:
+            frames = samples[:whole].reshape(-1, bucket)
+            mins.append(frames.min(axis=1))
+            maxs.append(frames.max(axis=1))
+        carry = samples[whole:]
+    if len(carry):
+        mins.append(carry.min(keepdims=True))
+        maxs.append(carry.max(keepdims=True))
+
+    finest_min = np.concatenate(mins) if mins else np.empty(0, dtype=np.int16)
+    finest_max = np.concatenate(maxs) if maxs else np.empty(0, dtype=np.int16)
+
+    result_levels = []
+    for level in levels:
+        factor = max(level // base, 1)
+        samples_per_peak = factor * base
+        count = -(-len(finest_min) // factor)
+        pad = count * factor - len(finest_min)
+        # Pad the last group with its own edge values so it does not skew min/max
+        level_min = np.pad(finest_min, (0, pad), mode="edge").reshape(-1, factor).min(axis=1) if count else finest_min
+        level_max = np.pad(finest_max, (0, pad), mode="edge").reshape(-1, factor).max(axis=1) if count else finest_max
+        # Interleave min/max and keep the high byte: 8-bit resolution is plenty to draw
+        interleaved = np.empty(count * 2, dtype=np.int8)
+        interleaved[0::2] = level_min >> 8
+        interleaved[1::2] = level_max >> 8
+        result_levels.append({
+            "samples_per_peak": samples_per_peak,
+            "length": int(count),
+            "data": base64.b64encode(interleaved.tobytes()).decode("ascii"),
+        })
+
+    return {
+        "version": 1,
+        "sample_rate": sample_rate,
+        "bits": 8,
+        "levels": result_levels,
+    }
+
+
+class WaveformService:
+    def _waveform_path(self, user_id: str, record_id: str) -> str:
+        return f"users/{user_id}/records/{record_id}/{WAVEFORM_FILENAME}"
+
+    async def generate_waveform(self, user_id: str, record_id: str, source_path: str) -> bool:
+        """Compute the peak index for a local audio file and store it next to the audio"""
+        try:
+            peaks = await run_in_process(
+                _compute_peaks,
+                settings.ffmpeg_path,
+                source_path,
+                settings.waveform_sample_rate,
+                settings.waveform_levels
+            )
+        except Exception as e:
+            print(f"❌ Error computing waveform: {e}")
+            return False
+
+        content = json.dumps(peaks, separators=(",", ":")).encode("utf-8")
+
+        async def single_chunk():
+            yield content
+
+        try:
+            return await storage_service.upload_object_stream(
+                self._waveform_path(user_id, record_id),
+                single_chunk(),
+                "application/json",
+                upsert=True
+            )
+        except Exception as e:
+            print(f"❌ Error storing waveform: {e}")
+            return False
+
+    async def get_waveform(self, user_id: str, record_id: str, level: Optional[int] = None) -> Optional[dict]:
+        """Get the stored peak index, optionally narrowed to one zoom level"""
+        content = await storage_service.download_object(self._waveform_path(user_id, record_id))
+        if content is None:
+            return None
+
+        peaks = json.loads(content)
+        if level is not None:
+            peaks["levels"] = [entry for entry in peaks["levels"] if entry["samples_per_peak"] == level]
+        return peaks
+
+
+# Service instance
+waveform_service = WaveformService()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Script to create records for a user from a CSV or JSONL file of title/script/description rows
+
+CSV files need a header row naming the title and script columns (description
+is optional); JSONL files hold one JSON object per line.
+"""
+
+import argparse
+import asyncio
+from app.core.database import db
+from app.services.import_service import import_service, ImportFormatError, detect_format
+from app.services.user_service import user_service
+
+async def import_records(args):
+    """Import the file for the user given by email"""
+    user = await user_service.get_user_by_email(args.email)
+    if not user:
+        print(f"❌ No user with email {args.email}")
+        return
+
+    try:
+        file_format = args.format or detect_format(args.path)
+        print(f"📥 Importing {args.path} ({file_format}) for {user.email}...")
+        print("=" * 50)
+        report = await import_service.import_file(args.path, file_format, user.id)
+    except ImportFormatError as e:
+        print(f"❌ {e}")
+        return
+    finally:
+        db.disconnect()
+
+    print(f"   created: {report.created}")
+    print(f"   invalid: {report.invalid}")
+    print(f"   failed:  {report.failed}")
+    for error in report.errors:
+        print(f"   line {error.line}: {error.error}")
+    if report.errors_truncated:
+        print("   ... more errors not listed")
+    if report.invalid or report.failed:
+        print("\n⚠️  Import finished with errors")
+    else:
+        print("\n🎉 Import completed")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("path", help="CSV or JSONL file to import")
+    parser.add_argument("--email", required=True, help="email of the user who will own the records")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="file format (default: from the extension)")
+    asyncio.run(import_records(parser.parse_args()))
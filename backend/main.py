@@ -1,6 +1,5 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 import os
 import logging
 
@@ -27,11 +26,37 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Handle upload directory for Vercel (read-only file system)
-upload_dir = os.getenv("UPLOAD_DIR", "uploads")
-# Only mount static files if directory exists and we're not in Vercel
-if os.path.exists(upload_dir) and not os.getenv("VERCEL"):
-    app.mount("/uploads", StaticFiles(directory=upload_dir), name="uploads")
+
+@app.on_event("startup")
+async def startup():
+    """Resolve storage bucket readiness once instead of on the first upload"""
+    try:
+        from app.services.storage_service import storage_service
+        await storage_service.ensure_bucket()
+    except Exception as e:
+        logger.error(f"Storage bucket check failed at startup: {e}")
+    
+    # Background upload workers need a process that outlives the request (not Vercel)
+    try:
+        from app.core.config import settings
+        if settings.upload_job_workers > 0 and not os.getenv("VERCEL"):
+            from app.services.upload_job_service import upload_job_service
+            await upload_job_service.start()
+    except Exception as e:
+        logger.error(f"Upload job workers failed to start: {e}")
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Stop upload workers and release pooled HTTP connections, I/O threads and worker processes"""
+    from app.core.http import close_http_client
+    from app.core.database import db
+    from app.core.processes import shutdown_process_pool
+    from app.services.upload_job_service import upload_job_service
+    await upload_job_service.stop()
+    await close_http_client()
+    db.disconnect()
+    shutdown_process_pool()
 
 
 @app.get("/")
@@ -68,14 +93,23 @@ async def debug_raw_env():
 # Only include routers if environment variables are set
 try:
     logger.info("Attempting to import API routers...")
-    from app.api import auth, records
+    from app.api import auth, records, uploads, jobs
     from app.core.config import settings
+    from app.services.record_service import record_service
+    from app.services.user_service import user_service
     
     logger.info("Successfully imported API routers")
     
     # Include routers
     app.include_router(auth.router, prefix="/api/v1")
     app.include_router(records.router, prefix="/api/v1")
+    app.include_router(uploads.router, prefix="/api/v1")
+    app.include_router(jobs.router, prefix="/api/v1")
+    
+    # Local storage backend objects are served by the app itself (not on Vercel's read-only disk)
+    if settings.storage_backend == "local" and not os.getenv("VERCEL"):
+        from app.api import files
+        app.include_router(files.router)
     
     logger.info("Successfully included API routers")
     
@@ -89,7 +123,9 @@ try:
             "cors_origins": settings.cors_origins,
             "upload_dir": settings.upload_dir,
             "has_supabase_key": bool(settings.supabase_key),
-            "has_jwt_secret": bool(settings.jwt_secret_key)
+            "has_jwt_secret": bool(settings.jwt_secret_key),
+            "record_cache": record_service.cache_stats(),
+            "user_cache": user_service.cache_stats()
         }
         
 except Exception as e:
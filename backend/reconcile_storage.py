@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Script to find and delete storage objects that no record, upload session or blob points at
+
+Run it repeatedly with the same --checkpoint file to cover a large bucket in
+several bounded passes (see --max-prefixes).
+"""
+
+import argparse
+import asyncio
+from dataclasses import asdict
+from app.core.http import close_http_client
+from app.services.reconcile_service import reconcile_service
+
+async def reconcile_storage(args):
+    """Walk the bucket from the checkpoint and remove orphaned objects"""
+    mode = "dry run" if args.dry_run else "deleting orphans"
+    print(f"🧹 Reconciling storage ({mode})...")
+    print("=" * 50)
+    
+    try:
+        report = await reconcile_service.run(
+            dry_run=args.dry_run,
+            checkpoint_path=args.checkpoint,
+            grace_hours=args.grace_hours,
+            concurrency=args.concurrency,
+            max_prefixes=args.max_prefixes
+        )
+    finally:
+        await close_http_client()
+    
+    for key, value in asdict(report).items():
+        print(f"   {key}: {value}")
+    if report.complete:
+        print("\n🎉 Full pass completed")
+    else:
+        print(f"\n⏸️  Stopped early; run again to continue from {args.checkpoint}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--dry-run", action="store_true", help="report orphans without deleting them")
+    parser.add_argument("--checkpoint", default="reconcile_checkpoint.json", help="file recording how far the walk got")
+    parser.add_argument("--grace-hours", type=float, help="only delete objects older than this (default RECONCILE_GRACE_HOURS)")
+    parser.add_argument("--concurrency", type=int, help="folders listed at once (default RECONCILE_CONCURRENCY)")
+    parser.add_argument("--max-prefixes", type=int, help="stop after this many user folders / blob shards")
+    asyncio.run(reconcile_storage(parser.parse_args()))
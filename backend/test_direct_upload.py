@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Test script for the direct-to-storage upload flow
+
+Start the backend with STORAGE_BACKEND=local first, so the signed upload URL
+points at the local /uploads stand-in instead of Supabase Storage.
+"""
+
+import asyncio
+import httpx
+import io
+import wave
+from app.core.auth import create_access_token
+
+def make_wav(seconds: float = 1.5, sample_rate: int = 16000) -> bytes:
+    """A silent mono 16-bit WAV file"""
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as writer:
+        writer.setnchannels(1)
+        writer.setsampwidth(2)
+        writer.setframerate(sample_rate)
+        writer.writeframes(b"\x00\x00" * int(seconds * sample_rate))
+    return buffer.getvalue()
+
+async def test_direct_upload():
+    """Test issuing, using and finalizing a direct upload"""
+    print("🔍 Testing Direct Upload Flow...")
+    print("=" * 60)
+    
+    try:
+        # Get a user ID from the database
+        from app.core.database import get_db
+        db = get_db()
+        users_result = db.table("users").select("*").limit(1).execute()
+        
+        if not users_result.data:
+            print("❌ No users found")
+            return
+        
+        user_id = users_result.data[0]['id']
+        token = create_access_token(data={"sub": user_id})
+        
+        async with httpx.AsyncClient() as client:
+            base_url = "http://localhost:8000/api/v1"
+            headers = {"Authorization": f"Bearer {token}"}
+            
+            print("📝 Creating test record...")
+            response = await client.post(f"{base_url}/records/", json={
+                "title": "Direct Upload Test Record",
+                "script": "This is a test script for direct upload."
+            }, headers=headers)
+            if response.status_code != 200:
+                print(f"❌ Failed to create record: {response.text}")
+                return
+            record_id = response.json()['id']
+            print(f"✅ Created record: {record_id}")
+            
+            print("\n🔏 Requesting upload target...")
+            content = make_wav()
+            response = await client.post(f"{base_url}/records/{record_id}/direct-uploads", json={
+                "filename": "test.wav",
+                "content_type": "audio/wav",
+                "size": len(content)
+            }, headers=headers)
+            if response.status_code != 201:
+                print(f"❌ Failed to get upload target: {response.text}")
+                return
+            upload = response.json()
+            print(f"✅ Upload URL: {upload['upload_url']}")
+            
+            print("\n⬆️  Uploading without the API in the path...")
+            response = await client.request(upload['method'], upload['upload_url'], content=content, headers=upload['headers'])
+            print(f"Upload status: {response.status_code}")
+            
+            response = await client.request(upload['method'], upload['upload_url'], content=content, headers=upload['headers'])
+            print(f"Second upload to the same target (expect 409): {response.status_code}")
+            
+            response = await client.request(upload['method'], upload['upload_url'] + "x", content=content, headers=upload['headers'])
+            print(f"Upload with a tampered token (expect 403): {response.status_code}")
+            
+            print("\n✅ Finalizing...")
+            response = await client.post(f"{base_url}/records/{record_id}/direct-uploads/finalize", json={
+                "upload_token": upload['upload_token']
+            }, headers=headers)
+            if response.status_code != 200:
+                print(f"❌ Failed to finalize: {response.text}")
+                return
+            record = response.json()['record']
+            print(f"Audio URL: {record['audio_file_path']}")
+            print(f"Duration (expect 1.5): {record.get('duration')}")
+            print(f"Sample rate (expect 16000): {record.get('sample_rate')}")
+            
+            # Clean up
+            await client.delete(f"{base_url}/records/{record_id}", headers=headers)
+            print("\n🧹 Deleted test record")
+            
+    except Exception as e:
+        print(f"❌ Test error: {e}")
+
+if __name__ == "__main__":
+    asyncio.run(test_direct_upload())
@@ -29,12 +29,21 @@ async def test_frontend_data():
             base_url = "http://localhost:8000/api/v1"
             headers = {"Authorization": f"Bearer {token}"}
             
-            # Get all records
+            # Get all records, one page at a time
             print("📋 Getting all records...")
-            response = await client.get(f"{base_url}/records/", headers=headers)
+            records = []
+            params = {"limit": 200}
+            while True:
+                response = await client.get(f"{base_url}/records/", headers=headers, params=params)
+                if response.status_code != 200:
+                    break
+                page = response.json()
+                records.extend(page["items"])
+                if not page["next_cursor"]:
+                    break
+                params["cursor"] = page["next_cursor"]
             
             if response.status_code == 200:
-                records = response.json()
                 print(f"✅ Found {len(records)} records")
                 
                 for i, record in enumerate(records):
@@ -7,6 +7,14 @@ ALTER TABLE users DISABLE ROW LEVEL SECURITY;
 -- Disable RLS on records table  
 ALTER TABLE records DISABLE ROW LEVEL SECURITY;
 
+-- Disable RLS on the upload, blob, stats and refresh token tables
+ALTER TABLE upload_sessions DISABLE ROW LEVEL SECURITY;
+ALTER TABLE upload_session_chunks DISABLE ROW LEVEL SECURITY;
+ALTER TABLE upload_jobs DISABLE ROW LEVEL SECURITY;
+ALTER TABLE audio_blobs DISABLE ROW LEVEL SECURITY;
+ALTER TABLE user_record_stats DISABLE ROW LEVEL SECURITY;
+ALTER TABLE spent_refresh_tokens DISABLE ROW LEVEL SECURITY;
+
 -- Drop existing RLS policies (if any)
 DROP POLICY IF EXISTS "Users can view their own profile" ON users;
 DROP POLICY IF EXISTS "Users can update their own profile" ON users;
@@ -14,6 +22,10 @@ DROP POLICY IF EXISTS "Users can view their own records" ON records;
 DROP POLICY IF EXISTS "Users can insert their own records" ON records;
 DROP POLICY IF EXISTS "Users can update their own records" ON records;
 DROP POLICY IF EXISTS "Users can delete their own records" ON records;
+DROP POLICY IF EXISTS "Users can view their own upload sessions" ON upload_sessions;
+DROP POLICY IF EXISTS "Users can view chunks of their own upload sessions" ON upload_session_chunks;
+DROP POLICY IF EXISTS "Users can view their own upload jobs" ON upload_jobs;
+DROP POLICY IF EXISTS "Users can view their own record stats" ON user_record_stats;
 
 -- Note: After running this, the application will handle authorization at the API level
 -- using JWT tokens instead of database-level RLS policies
@@ -15,3 +15,8 @@ GRANT ALL ON storage.objects TO anon;
 -- Make sure the bucket exists and is public
 -- Note: This should be done through the Supabase dashboard or API
 -- The bucket should be created with public access enabled
+
+-- Allow the waveform peak indexes (JSON) stored next to each recording
+UPDATE storage.buckets
+SET allowed_mime_types = ARRAY['audio/*', 'application/json']
+WHERE id = 'audio-recordings';
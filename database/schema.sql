@@ -109,3 +109,336 @@ CREATE TRIGGER update_records_updated_at BEFORE UPDATE ON records
 --         (storage.foldername(name))[1] = 'users' AND
 --         (storage.foldername(name))[2] = auth.uid()::text
 --     );
+
+-- Resumable chunked upload sessions
+CREATE TABLE IF NOT EXISTS upload_sessions (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    record_id UUID NOT NULL REFERENCES records(id) ON DELETE CASCADE,
+    filename VARCHAR(255) NOT NULL,
+    content_type VARCHAR(255) NOT NULL,
+    chunk_size INTEGER NOT NULL,
+    total_size BIGINT,
+    status VARCHAR(20) NOT NULL DEFAULT 'open',
+    expires_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS upload_session_chunks (
+    session_id UUID NOT NULL REFERENCES upload_sessions(id) ON DELETE CASCADE,
+    chunk_index INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    PRIMARY KEY (session_id, chunk_index)
+);
+
+CREATE INDEX IF NOT EXISTS idx_upload_sessions_record_id ON upload_sessions(record_id);
+
+-- Original upload kept alongside the transcoded audio
+ALTER TABLE records ADD COLUMN IF NOT EXISTS original_audio_file_path TEXT;
+
+-- Audio metadata read from container headers at upload time
+ALTER TABLE records ADD COLUMN IF NOT EXISTS sample_rate INTEGER;
+ALTER TABLE records ADD COLUMN IF NOT EXISTS channels SMALLINT;
+ALTER TABLE records ADD COLUMN IF NOT EXISTS codec VARCHAR(50);
+
+-- Content-addressed audio blobs shared between records
+CREATE TABLE IF NOT EXISTS audio_blobs (
+    digest VARCHAR(64) PRIMARY KEY,
+    storage_path TEXT NOT NULL,
+    size BIGINT NOT NULL,
+    content_type VARCHAR(255) NOT NULL,
+    ref_count INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- 'pending' until the object is written, 'ready' once it can be referenced,
+-- 'deleting' while the object of an unreferenced blob is removed
+ALTER TABLE audio_blobs ADD COLUMN IF NOT EXISTS state VARCHAR(10) NOT NULL DEFAULT 'ready';
+ALTER TABLE audio_blobs ADD COLUMN IF NOT EXISTS state_changed_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW();
+
+ALTER TABLE records ADD COLUMN IF NOT EXISTS audio_digest VARCHAR(64);
+CREATE INDEX IF NOT EXISTS idx_records_audio_digest ON records(audio_digest);
+
+-- Take a reference on a blob, creating a 'pending' row on first use. Returns no
+-- row while the blob is being deleted; the caller retries once the row is gone.
+DROP FUNCTION IF EXISTS acquire_audio_blob(TEXT, TEXT, BIGINT, TEXT);
+CREATE OR REPLACE FUNCTION acquire_audio_blob(p_digest TEXT, p_storage_path TEXT, p_size BIGINT, p_content_type TEXT)
+RETURNS TABLE (blob_path TEXT, created BOOLEAN, ready BOOLEAN) AS $$
+BEGIN
+    -- A deletion whose owner died between removing the object and the row
+    DELETE FROM audio_blobs AS b
+    WHERE b.digest = p_digest AND b.state = 'deleting' AND b.state_changed_at < NOW() - INTERVAL '10 minutes';
+
+    RETURN QUERY
+    INSERT INTO audio_blobs AS b (digest, storage_path, size, content_type, ref_count, state, state_changed_at)
+    VALUES (p_digest, p_storage_path, p_size, p_content_type, 1, 'pending', NOW())
+    ON CONFLICT (digest) DO UPDATE SET ref_count = b.ref_count + 1
+    WHERE b.state <> 'deleting'
+    RETURNING b.storage_path, (xmax = 0), b.state = 'ready';
+END;
+$$ language 'plpgsql';
+
+-- Drop a reference on a blob and report how many remain
+CREATE OR REPLACE FUNCTION release_audio_blob(p_digest TEXT)
+RETURNS TABLE (blob_path TEXT, remaining INTEGER) AS $$
+BEGIN
+    RETURN QUERY
+    UPDATE audio_blobs AS b SET ref_count = b.ref_count - 1
+    WHERE b.digest = p_digest
+    RETURNING b.storage_path, b.ref_count;
+END;
+$$ language 'plpgsql';
+
+-- Drop references on many blobs at once (a digest listed twice loses two references)
+CREATE OR REPLACE FUNCTION release_audio_blobs(p_digests TEXT[])
+RETURNS TABLE (digest TEXT, blob_path TEXT, remaining INTEGER) AS $$
+BEGIN
+    RETURN QUERY
+    UPDATE audio_blobs AS b SET ref_count = b.ref_count - r.n
+    FROM (SELECT d, COUNT(*)::INTEGER AS n FROM unnest(p_digests) AS d GROUP BY d) AS r
+    WHERE b.digest = r.d
+    RETURNING b.digest::TEXT, b.storage_path, b.ref_count;
+END;
+$$ language 'plpgsql';
+
+-- Uploads accepted with 202 and stored by background workers
+CREATE TABLE IF NOT EXISTS upload_jobs (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    record_id UUID NOT NULL REFERENCES records(id) ON DELETE CASCADE,
+    filename VARCHAR(255) NOT NULL,
+    content_type VARCHAR(255) NOT NULL,
+    size BIGINT NOT NULL,
+    spool_host VARCHAR(255),
+    status VARCHAR(20) NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    finished_at TIMESTAMP WITH TIME ZONE
+);
+
+-- Each host only recovers the jobs whose uploads sit in its own spool dir
+ALTER TABLE upload_jobs ADD COLUMN IF NOT EXISTS spool_host VARCHAR(255);
+
+-- Startup recovery looks for unfinished jobs only
+CREATE INDEX IF NOT EXISTS idx_upload_jobs_unfinished ON upload_jobs(created_at) WHERE status IN ('queued', 'processing');
+
+-- Keyset pagination of a user's records on (created_at, id), newest first
+CREATE INDEX IF NOT EXISTS idx_records_user_created_id ON records(user_id, created_at DESC, id DESC);
+
+-- Listing columns computed once on write, so summaries never read the full script
+ALTER TABLE records ADD COLUMN IF NOT EXISTS script_preview TEXT GENERATED ALWAYS AS (left(script, 200)) STORED;
+ALTER TABLE records ADD COLUMN IF NOT EXISTS script_length INTEGER GENERATED ALWAYS AS (char_length(script)) STORED;
+
+-- Full-text search over title (weight A), description (B) and script (C)
+ALTER TABLE records ADD COLUMN IF NOT EXISTS search_vector TSVECTOR GENERATED ALWAYS AS (
+    setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce(description, '')), 'B') ||
+    setweight(to_tsvector('english', coalesce(script, '')), 'C')
+) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_records_search_vector ON records USING GIN (search_vector);
+
+-- One page of a user's matches, best first, continuing after (p_after_rank, p_after_id).
+-- Snippets are only built for the rows of the page.
+CREATE OR REPLACE FUNCTION search_records(
+    p_user_id UUID,
+    p_query TEXT,
+    p_limit INTEGER,
+    p_after_rank REAL DEFAULT NULL,
+    p_after_id UUID DEFAULT NULL
+)
+RETURNS TABLE (
+    id UUID,
+    user_id UUID,
+    title VARCHAR,
+    script_preview TEXT,
+    script_length INTEGER,
+    audio_file_path TEXT,
+    duration FLOAT,
+    created_at TIMESTAMP WITH TIME ZONE,
+    updated_at TIMESTAMP WITH TIME ZONE,
+    rank REAL,
+    snippet TEXT
+) AS $$
+    WITH search AS (
+        SELECT websearch_to_tsquery('english', p_query) AS query
+    ),
+    page AS (
+        SELECT r.id, r.user_id, r.title, r.script, r.script_preview, r.script_length,
+               r.audio_file_path, r.duration, r.created_at, r.updated_at,
+               ts_rank(r.search_vector, search.query) AS match_rank, search.query
+        FROM records r, search
+        WHERE r.user_id = p_user_id
+          AND r.search_vector @@ search.query
+          AND (p_after_rank IS NULL OR (ts_rank(r.search_vector, search.query), r.id) < (p_after_rank, p_after_id))
+        ORDER BY match_rank DESC, r.id DESC
+        LIMIT p_limit
+    )
+    SELECT page.id, page.user_id, page.title, page.script_preview, page.script_length,
+           page.audio_file_path, page.duration, page.created_at, page.updated_at, page.match_rank,
+           ts_headline('english', page.script, page.query, 'MaxFragments=1, MaxWords=20, MinWords=5')
+    FROM page
+    ORDER BY page.match_rank DESC, page.id DESC;
+$$ LANGUAGE sql STABLE;
+
+-- Version check behind conditional GET /records/: latest updated_at per user
+CREATE INDEX IF NOT EXISTS idx_records_user_updated ON records(user_id, updated_at DESC);
+
+-- Stored audio size, summed into user_record_stats
+ALTER TABLE records ADD COLUMN IF NOT EXISTS audio_size BIGINT;
+
+-- Per-user totals behind GET /records/stats, kept current by the triggers below
+CREATE TABLE IF NOT EXISTS user_record_stats (
+    user_id UUID PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    record_count BIGINT NOT NULL DEFAULT 0,
+    audio_count BIGINT NOT NULL DEFAULT 0,
+    total_duration DOUBLE PRECISION NOT NULL DEFAULT 0,
+    total_audio_size BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Add (p_sign = 1) or subtract (p_sign = -1) the totals of a set of record rows.
+-- Subtracting only updates existing rows: when a user is deleted, the cascaded
+-- record delete must not recreate the stats row it is about to lose.
+CREATE OR REPLACE FUNCTION apply_record_stats(p_rows JSONB, p_sign INTEGER)
+RETURNS VOID AS $$
+BEGIN
+    IF p_sign > 0 THEN
+        INSERT INTO user_record_stats AS s (user_id, record_count, audio_count, total_duration, total_audio_size)
+        SELECT r.user_id, count(*), count(r.audio_file_path), coalesce(sum(r.duration), 0), coalesce(sum(r.audio_size), 0)
+        FROM jsonb_to_recordset(p_rows) AS r(user_id UUID, audio_file_path TEXT, duration DOUBLE PRECISION, audio_size BIGINT)
+        GROUP BY r.user_id
+        ON CONFLICT (user_id) DO UPDATE
+        SET record_count = s.record_count + EXCLUDED.record_count,
+            audio_count = s.audio_count + EXCLUDED.audio_count,
+            total_duration = s.total_duration + EXCLUDED.total_duration,
+            total_audio_size = s.total_audio_size + EXCLUDED.total_audio_size,
+            updated_at = NOW();
+    ELSE
+        UPDATE user_record_stats AS s
+        SET record_count = s.record_count - d.record_count,
+            audio_count = s.audio_count - d.audio_count,
+            total_duration = s.total_duration - d.total_duration,
+            total_audio_size = s.total_audio_size - d.total_audio_size,
+            updated_at = NOW()
+        FROM (
+            SELECT r.user_id, count(*) AS record_count, count(r.audio_file_path) AS audio_count,
+                   coalesce(sum(r.duration), 0) AS total_duration, coalesce(sum(r.audio_size), 0) AS total_audio_size
+            FROM jsonb_to_recordset(p_rows) AS r(user_id UUID, audio_file_path TEXT, duration DOUBLE PRECISION, audio_size BIGINT)
+            GROUP BY r.user_id
+        ) AS d
+        WHERE s.user_id = d.user_id;
+    END IF;
+END;
+$$ language 'plpgsql';
+
+-- Statement-level, so a multi-row insert or bulk delete touches each user's row once.
+-- Each branch only names the transition tables its operation provides.
+CREATE OR REPLACE FUNCTION maintain_record_stats()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM apply_record_stats(
+            (SELECT coalesce(jsonb_agg(jsonb_build_object('user_id', user_id, 'audio_file_path', audio_file_path, 'duration', duration, 'audio_size', audio_size)), '[]') FROM old_rows),
+            -1
+        );
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM apply_record_stats(
+            (SELECT coalesce(jsonb_agg(jsonb_build_object('user_id', user_id, 'audio_file_path', audio_file_path, 'duration', duration, 'audio_size', audio_size)), '[]') FROM new_rows),
+            1
+        );
+    END IF;
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+DROP TRIGGER IF EXISTS records_stats_insert ON records;
+CREATE TRIGGER records_stats_insert AFTER INSERT ON records
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION maintain_record_stats();
+
+DROP TRIGGER IF EXISTS records_stats_update ON records;
+CREATE TRIGGER records_stats_update AFTER UPDATE ON records
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION maintain_record_stats();
+
+DROP TRIGGER IF EXISTS records_stats_delete ON records;
+CREATE TRIGGER records_stats_delete AFTER DELETE ON records
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION maintain_record_stats();
+
+-- Backfill existing users; rerunning it resets the totals to the true sums
+INSERT INTO user_record_stats (user_id, record_count, audio_count, total_duration, total_audio_size)
+SELECT user_id, count(*), count(audio_file_path), coalesce(sum(duration), 0), coalesce(sum(audio_size), 0)
+FROM records
+GROUP BY user_id
+ON CONFLICT (user_id) DO UPDATE
+SET record_count = EXCLUDED.record_count,
+    audio_count = EXCLUDED.audio_count,
+    total_duration = EXCLUDED.total_duration,
+    total_audio_size = EXCLUDED.total_audio_size,
+    updated_at = NOW();
+
+-- Refresh tokens that were exchanged or logged out, shared by every server process.
+-- Rows only matter until the token expires, so spending one also clears expired rows.
+CREATE TABLE IF NOT EXISTS spent_refresh_tokens (
+    jti TEXT PRIMARY KEY,
+    expires_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    spent_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_spent_refresh_tokens_expires_at ON spent_refresh_tokens(expires_at);
+
+-- Spend a refresh token; returns a row only for the first caller to spend it
+CREATE OR REPLACE FUNCTION spend_refresh_token(p_jti TEXT, p_expires_at TIMESTAMP WITH TIME ZONE)
+RETURNS TABLE (jti TEXT) AS $$
+BEGIN
+    DELETE FROM spent_refresh_tokens AS s WHERE s.expires_at < NOW();
+    RETURN QUERY
+    INSERT INTO spent_refresh_tokens AS s (jti, expires_at)
+    VALUES (p_jti, p_expires_at)
+    ON CONFLICT DO NOTHING
+    RETURNING s.jti;
+END;
+$$ language 'plpgsql';
+
+-- Row Level Security for the tables added after the baseline, matching users and records.
+-- The backend uses SUPABASE_KEY and authorizes in the API layer, so like users and
+-- records these are switched off again by disable_rls.sql for that setup.
+ALTER TABLE upload_sessions ENABLE ROW LEVEL SECURITY;
+ALTER TABLE upload_session_chunks ENABLE ROW LEVEL SECURITY;
+ALTER TABLE upload_jobs ENABLE ROW LEVEL SECURITY;
+ALTER TABLE user_record_stats ENABLE ROW LEVEL SECURITY;
+-- Blobs are shared between users and reference counted, so they get no policies: service role only
+ALTER TABLE audio_blobs ENABLE ROW LEVEL SECURITY;
+-- Spent refresh tokens are only checked by the API, so they get no policies either
+ALTER TABLE spent_refresh_tokens ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Users can view their own upload sessions" ON upload_sessions;
+CREATE POLICY "Users can view their own upload sessions" ON upload_sessions
+    FOR SELECT USING (auth.uid()::text = user_id::text);
+
+DROP POLICY IF EXISTS "Users can view chunks of their own upload sessions" ON upload_session_chunks;
+CREATE POLICY "Users can view chunks of their own upload sessions" ON upload_session_chunks
+    FOR SELECT USING (EXISTS (
+        SELECT 1 FROM upload_sessions s
+        WHERE s.id = session_id AND auth.uid()::text = s.user_id::text
+    ));
+
+DROP POLICY IF EXISTS "Users can view their own upload jobs" ON upload_jobs;
+CREATE POLICY "Users can view their own upload jobs" ON upload_jobs
+    FOR SELECT USING (auth.uid()::text = user_id::text);
+
+-- Totals are only ever written by the triggers above
+DROP POLICY IF EXISTS "Users can view their own record stats" ON user_record_stats;
+CREATE POLICY "Users can view their own record stats" ON user_record_stats
+    FOR SELECT USING (auth.uid()::text = user_id::text);
+
+-- The stats triggers fire for whoever writes records, so they run with the owner's rights
+ALTER FUNCTION maintain_record_stats() SECURITY DEFINER SET search_path = public;
+ALTER FUNCTION apply_record_stats(JSONB, INTEGER) SECURITY DEFINER SET search_path = public;
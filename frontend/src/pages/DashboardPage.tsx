@@ -2,7 +2,7 @@ import React, { useState, useEffect, useMemo } from 'react';
 import { Plus, LogOut, User, X, Mic, MicOff, Search, Grid, List, HelpCircle, FileText } from 'lucide-react';
 import { useAuthStore } from '../store/authStore';
 import { apiService } from '../services/api';
-import { Record, CreateRecordRequest } from '../types';
+import { Record, RecordStats, CreateRecordRequest } from '../types';
 import RecordCard from '../components/RecordCard';
 import RecordForm from '../components/RecordForm';
 import VoiceRecorder from '../components/VoiceRecorder';
@@ -18,6 +18,9 @@ const DashboardPage: React.FC = () => {
   const { user, logout } = useAuthStore();
   const [records, setRecords] = useState<Record[]>([]);
   const [isLoading, setIsLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [stats, setStats] = useState<RecordStats | null>(null);
+  const [isLoadingMore, setIsLoadingMore] = useState(false);
   const [showCreateForm, setShowCreateForm] = useState(false);
   const [editingRecord, setEditingRecord] = useState<Record | null>(null);
   const [isRecording, setIsRecording] = useState(false);
@@ -39,14 +42,25 @@ const DashboardPage: React.FC = () => {
     }
   }, []);
 
+  const fetchStats = async () => {
+    try {
+      setStats(await apiService.getRecordStats());
+    } catch (error) {
+      // The header falls back to counting loaded records
+      console.error('Error fetching record stats:', error);
+    }
+  };
+
   const fetchRecords = async () => {
     try {
       setIsLoading(true);
-      const data = await apiService.getRecords();
-      setRecords(data);
+      fetchStats();
+      const page = await apiService.getRecords();
+      setRecords(page.items);
+      setNextCursor(page.next_cursor);
       
       // Hide welcome guide if user has records
-      if (data.length > 0) {
+      if (page.items.length > 0) {
         localStorage.setItem('hasSeenWelcome', 'true');
       }
     } catch (error) {
@@ -57,6 +71,22 @@ const DashboardPage: React.FC = () => {
     }
   };
 
+  const loadMoreRecords = async () => {
+    if (!nextCursor) return;
+    
+    try {
+      setIsLoadingMore(true);
+      const page = await apiService.getRecords(nextCursor);
+      setRecords(current => [...current, ...page.items]);
+      setNextCursor(page.next_cursor);
+    } catch (error) {
+      console.error('Error loading more records:', error);
+      toast.error('Failed to load more records');
+    } finally {
+      setIsLoadingMore(false);
+    }
+  };
+
   // Filtered and sorted records
   const filteredRecords = useMemo(() => {
     let filtered = records;
@@ -157,6 +187,7 @@ const DashboardPage: React.FC = () => {
     try {
       await apiService.deleteRecord(recordId);
       setRecords(records.filter(r => r.id !== recordId));
+      fetchStats();
       toast.success('Record deleted successfully!');
     } catch (error) {
       console.error('Error deleting record:', error);
@@ -188,7 +219,13 @@ const DashboardPage: React.FC = () => {
     setIsRecording(false);
   };
 
-  const handleLogout = () => {
+  const handleLogout = async () => {
+    try {
+      await apiService.logout();
+    } catch (error) {
+      // The local session is cleared either way
+      console.error('Error revoking session:', error);
+    }
     logout();
     toast.success('Logged out successfully');
   };
@@ -272,8 +309,11 @@ const DashboardPage: React.FC = () => {
               <p className="text-gray-600 text-responsive-base">
                 {filteredRecords.length === 0 
                   ? 'No records found' 
-                  : `${filteredRecords.length} of ${records.length} record(s)`
+                  : `${filteredRecords.length} of ${stats ? stats.record_count : records.length} record(s)`
                 }
+                {stats && stats.audio_count > 0 && (
+                  ` • ${stats.audio_count} with audio • ${Math.round(stats.total_duration / 60)} min recorded`
+                )}
               </p>
             </div>
             <div className="flex items-center space-x-2 mt-4 sm:mt-0">
@@ -395,6 +435,19 @@ const DashboardPage: React.FC = () => {
             ))}
           </div>
         )}
+
+        {/* Older records are fetched a page at a time */}
+        {nextCursor && (
+          <div className="text-center mt-8">
+            <button
+              onClick={loadMoreRecords}
+              disabled={isLoadingMore}
+              className="btn-secondary"
+            >
+              {isLoadingMore ? 'Loading...' : 'Load more'}
+            </button>
+          </div>
+        )}
       </div>
 
       {/* Create/Edit Form Popup */}
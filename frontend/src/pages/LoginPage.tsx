@@ -16,16 +16,18 @@ const LoginPage: React.FC = () => {
       return;
     }
 
-    // Handle OAuth callback
-    const token = searchParams.get('token');
+    // Handle OAuth callback; tokens arrive in the fragment, which never reaches servers, logs or Referer headers
+    const fragment = new URLSearchParams(window.location.hash.slice(1));
+    const token = fragment.get('token') || searchParams.get('token');
     if (token) {
-      handleAuthCallback(token);
+      window.history.replaceState(null, '', window.location.pathname);
+      handleAuthCallback(token, fragment.get('refresh_token'));
     }
   }, [isAuthenticated, navigate, searchParams]);
 
-  const handleAuthCallback = async (token: string) => {
+  const handleAuthCallback = async (token: string, refreshToken: string | null) => {
     try {
-      setToken(token);
+      setToken(token, refreshToken);
       const user = await apiService.getCurrentUser();
       setUser(user);
       toast.success('Successfully logged in!');
@@ -1,13 +1,17 @@
-import axios, { AxiosInstance } from 'axios';
-import { User, Record, CreateRecordRequest, UpdateRecordRequest } from '../types';
+import axios, { AxiosInstance, AxiosRequestConfig } from 'axios';
+import { User, Record, RecordPage, RecordStats, TokenPair, CreateRecordRequest, UpdateRecordRequest } from '../types';
 
 // Fixed API URL - no more URL change issues
 const API_BASE_URL = import.meta.env.PROD 
   ? 'https://hvr-huzaifa-backend-2cbnqwiv8-huzaifas-projects-044fb73a.vercel.app/api/v1'
   : (import.meta.env.VITE_API_BASE_URL || 'http://localhost:8000/api/v1');
 
+// A 401 from these means the session itself is gone
+const NO_REFRESH_URLS = ['/auth/refresh', '/auth/logout'];
+
 class ApiService {
   private api: AxiosInstance;
+  private refreshing: Promise<boolean> | null = null;
 
   constructor() {
     this.api = axios.create({
@@ -29,9 +33,18 @@ class ApiService {
     // Add response interceptor to handle errors
     this.api.interceptors.response.use(
       (response) => response,
-      (error) => {
+      async (error) => {
+        const request = error.config as (AxiosRequestConfig & { _retried?: boolean }) | undefined;
+        if (error.response?.status === 401 && request && !request._retried && !NO_REFRESH_URLS.includes(request.url ?? '')) {
+          // An expired access token is renewed once with the refresh token, then the request is replayed
+          request._retried = true;
+          if (await this.refreshTokens()) {
+            return this.api(request);
+          }
+        }
         if (error.response?.status === 401) {
           localStorage.removeItem('access_token');
+          localStorage.removeItem('refresh_token');
           localStorage.removeItem('user');
           window.location.href = '/login';
         }
@@ -40,20 +53,54 @@ class ApiService {
     );
   }
 
+  // Concurrent 401s share one refresh, since each refresh token works once
+  private refreshTokens(): Promise<boolean> {
+    const refreshToken = localStorage.getItem('refresh_token');
+    if (!refreshToken) {
+      return Promise.resolve(false);
+    }
+    if (!this.refreshing) {
+      this.refreshing = this.api
+        .post('/auth/refresh', { refresh_token: refreshToken })
+        .then((response) => {
+          const tokens: TokenPair = response.data;
+          localStorage.setItem('access_token', tokens.access_token);
+          localStorage.setItem('refresh_token', tokens.refresh_token);
+          return true;
+        })
+        .catch(() => false)
+        .finally(() => {
+          this.refreshing = null;
+        });
+    }
+    return this.refreshing;
+  }
+
   // Auth endpoints
   async getGoogleAuthUrl(): Promise<{ auth_url: string }> {
     const response = await this.api.get('/auth/google');
     return response.data;
   }
 
+  async logout(): Promise<void> {
+    await this.api.post('/auth/logout', { refresh_token: localStorage.getItem('refresh_token') });
+  }
+
   async getCurrentUser(): Promise<User> {
     const response = await this.api.get('/auth/me');
     return response.data;
   }
 
   // Records endpoints
-  async getRecords(): Promise<Record[]> {
-    const response = await this.api.get('/records/');
+  async getRecords(cursor?: string | null, limit: number = 50): Promise<RecordPage> {
+    const response = await this.api.get('/records/', {
+      params: { limit, ...(cursor ? { cursor } : {}) },
+    });
+    return response.data;
+  }
+
+  async getRecordStats(): Promise<RecordStats> {
+    const response = await this.api.get('/records/stats');
     return response.data;
   }
 
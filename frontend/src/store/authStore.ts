@@ -7,7 +7,7 @@ interface AuthState {
   isAuthenticated: boolean;
   isLoading: boolean;
   setUser: (user: User) => void;
-  setToken: (token: string) => void;
+  setToken: (token: string, refreshToken?: string | null) => void;
   logout: () => void;
   setLoading: (loading: boolean) => void;
 }
@@ -23,13 +23,17 @@ export const useAuthStore = create<AuthState>((set) => ({
     set({ user, isAuthenticated: true });
   },
   
-  setToken: (token: string) => {
+  setToken: (token: string, refreshToken?: string | null) => {
     localStorage.setItem('access_token', token);
+    if (refreshToken) {
+      localStorage.setItem('refresh_token', refreshToken);
+    }
     set({ token, isAuthenticated: true });
   },
   
   logout: () => {
     localStorage.removeItem('access_token');
+    localStorage.removeItem('refresh_token');
     localStorage.removeItem('user');
     set({ user: null, token: null, isAuthenticated: false });
   },
@@ -16,10 +16,27 @@ export interface Record {
   description?: string;
   audio_file_path?: string;
   duration?: number;
+  sample_rate?: number;
+  channels?: number;
+  codec?: string;
+  audio_size?: number;
   created_at: string;
   updated_at: string;
 }
 
+export interface RecordPage {
+  items: Record[];
+  next_cursor: string | null;
+}
+
+export interface RecordStats {
+  record_count: number;
+  audio_count: number;
+  total_duration: number;
+  total_audio_size: number;
+  updated_at: string | null;
+}
+
 export interface CreateRecordRequest {
   title: string;
   script: string;
@@ -37,6 +54,13 @@ export interface AuthResponse {
   token_type: string;
 }
 
+export interface TokenPair {
+  access_token: string;
+  refresh_token: string;
+  token_type: string;
+  expires_in: number;
+}
+
 export interface ApiResponse<T> {
   data: T;
   message?: string;